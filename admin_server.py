@@ -0,0 +1,66 @@
+import logging
+import threading
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlparse
+
+ADMIN_HOST = '127.0.0.1'
+
+# Path -> function(query: dict) returning (status, content type, body).
+ROUTES = {}
+
+
+def route(path: str):
+    """Register function which answers GET requests to path."""
+    def decorator(function):
+        ROUTES[path] = function
+        return function
+    return decorator
+
+
+def admin_handler():
+    """Return request handler class of admin server.
+
+    `http.server` pulls in half of the standard library, so it is imported
+    only when the server starts and `metrics` stays cheap to import.
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class AdminHandler(BaseHTTPRequestHandler):
+        """Dispatch GET requests to registered routes."""
+
+        def do_GET(self) -> None:
+            """Answer with result of route registered for path."""
+            url = urlparse(self.path)
+            handler = ROUTES.get(url.path)
+            if handler is None:
+                status, content_type, body = (
+                    HTTPStatus.NOT_FOUND, 'text/plain', 'Not found\n'
+                )
+            else:
+                status, content_type, body = handler(parse_qs(url.query))
+            data = body.encode() if isinstance(body, str) else body
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args) -> None:
+            """Keep access log out of bot log."""
+
+    return AdminHandler
+
+
+def start_admin_server(port: int, host: str = ADMIN_HOST):
+    """Serve registered routes on local port in background thread."""
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), admin_handler())
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name='admin-server', daemon=True
+    ).start()
+    logging.info(
+        'Admin server listens on %s:%s', host, server.server_address[1]
+    )
+    return server
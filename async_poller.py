@@ -0,0 +1,266 @@
+import asyncio
+import json
+import logging
+import queue
+import time
+from http import HTTPStatus
+
+import aiohttp
+
+from breaker import CircuitBreaker
+from diff import diff
+from error_report import ErrorAggregator
+from exeption import CircuitOpenError, HTTPStatusError
+from health import Watchdog
+from homework import ENDPOINT, RETRY_TIME, check_response
+from http_client import CONCURRENCY, CONNECT_TIMEOUT, READ_TIMEOUT
+from metrics import PRACTICUM_LATENCY, TELEGRAM_FAILURES, TELEGRAM_LATENCY
+from poller import (
+    error_message,
+    paused_delay,
+    reconcile_tenants,
+    resolved_message,
+    restore_tenants,
+    save_due,
+    schedule_restored,
+)
+from scheduler import PollScheduler
+from tenants import subscribe_tenants
+
+TELEGRAM_API = 'https://api.telegram.org/bot{token}/sendMessage'
+
+
+async def get_api_answer(session, headers: dict,
+                         current_timestamp: int) -> dict:
+    """Send request to API without blocking and get response."""
+    timestamp = current_timestamp or int(time.time())
+    params = {'from_date': timestamp}
+
+    started = time.monotonic()
+    async with session.get(ENDPOINT, headers=headers,
+                           params=params) as response:
+        PRACTICUM_LATENCY.observe(
+            time.monotonic() - started, status=response.status
+        )
+        if response.status != HTTPStatus.OK:
+            logging.error(
+                'Not available ENDPOINT:%s.Status code: %s',
+                ENDPOINT, response.status)
+            raise HTTPStatusError(response)
+        try:
+            return await response.json(content_type=None)
+        except json.decoder.JSONDecodeError:
+            message = 'Transfotmation error JSON in python data'
+            logging.error(message)
+            raise KeyError(message)
+
+
+async def send_message(session, telegram_token: str, chat_id,
+                       message: str) -> None:
+    """Send message in Telegram chat without blocking."""
+    url = TELEGRAM_API.format(token=telegram_token)
+    started = time.monotonic()
+    try:
+        logging.info('The start of sending the message')
+        async with session.post(
+            url, json={'chat_id': chat_id, 'text': message}
+        ) as response:
+            if response.status != HTTPStatus.OK:
+                raise HTTPStatusError(response)
+    except Exception as error:
+        TELEGRAM_FAILURES.inc(reason='error')
+        message_err = (
+            'Error sending messages: %s to telegram chat with id: %s - %s.'
+        )
+        logging.error(message_err, message, chat_id, error)
+        raise KeyError(message_err % (message, chat_id, error))
+    else:
+        TELEGRAM_LATENCY.observe(time.monotonic() - started)
+        logging.info('The message successfully sent')
+
+
+class AsyncPoller:
+    """Poll Practicum API for every tenant concurrently."""
+
+    def __init__(self, telegram_token: str, tenants: list,
+                 retry_time: int = RETRY_TIME,
+                 concurrency: int = CONCURRENCY, session=None, store=None,
+                 scheduler=None, outbox=None, breaker=None, errors=None,
+                 watchdog=None,
+                 timeout: tuple = (CONNECT_TIMEOUT, READ_TIMEOUT)):
+        """Prepare poller of tenants with shared aiohttp session."""
+        self.telegram_token = telegram_token
+        self.outbox = outbox
+        self.breaker = breaker or CircuitBreaker()
+        self.errors = ErrorAggregator() if errors is None else errors
+        self.watchdog = Watchdog() if watchdog is None else watchdog
+        self.store = store
+        self.tenants = restore_tenants(subscribe_tenants(tenants), store)
+        if scheduler is None:
+            scheduler = PollScheduler(base_interval=retry_time)
+        self.scheduler = scheduler
+        self._tenants = {tenant.id: tenant for tenant in self.tenants}
+        schedule_restored(self.scheduler, self.tenants)
+        self._calls = queue.SimpleQueue()
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.session = session
+        self._semaphore = None
+        self._stopping = False
+        self._wakeup = None
+        self._loop = None
+
+    async def _send(self, chat_id, message: str) -> None:
+        if self.outbox is not None:
+            self.outbox.enqueue(chat_id, message)
+            return
+        async with self._semaphore:
+            await asyncio.wait_for(
+                send_message(
+                    self.session, self.telegram_token, chat_id, message
+                ),
+                self.watchdog.stall_timeout,
+            )
+
+    async def _request(self, headers: dict, cursor: int) -> dict:
+        # Request stuck on a socket is cancelled instead of wedging poller.
+        timeout = self.watchdog.stall_timeout
+        async with self._semaphore:
+            with self.breaker:
+                try:
+                    return await asyncio.wait_for(
+                        get_api_answer(self.session, headers, cursor),
+                        timeout,
+                    )
+                except asyncio.TimeoutError:
+                    raise asyncio.TimeoutError(
+                        f'No answer from API in {timeout:.0f} s'
+                    ) from None
+
+    async def poll_tenant(self, tenant) -> list:
+        """Check homeworks of one tenant and send changed statuses."""
+        response = await self._request(tenant.headers, tenant.cursor)
+        homeworks = check_response(response)
+        if len(homeworks) == 0:
+            logging.debug(
+                'No homeworks to check.', extra={'tenant': tenant.id}
+            )
+        changed = {}
+        try:
+            for event in diff(tenant.snapshot, homeworks):
+                message = event.message()
+                await asyncio.gather(*(
+                    self._send(chat_id, message)
+                    for chat_id in tenant.chat_ids
+                ))
+                tenant.snapshot[event.key] = event.fingerprint
+                changed[event.key] = event.fingerprint
+            tenant.cursor = response.get('current_date', tenant.cursor)
+        finally:
+            if self.store is not None:
+                self.store.save(tenant, changed)
+        return homeworks
+
+    async def handle_error(self, tenant, error: Exception) -> None:
+        """Report new error of tenant and summaries of repeated ones."""
+        await self.report(tenant, error_message(tenant, error, self.errors))
+
+    async def report(self, tenant, message: str) -> None:
+        """Send message about errors of tenant if there is one."""
+        if message is None:
+            return
+        try:
+            await self._send(tenant.chat_id, message)
+        except KeyError:
+            pass
+
+    async def poll_scheduled(self, tenant) -> None:
+        """Poll tenant and schedule its next poll by activity."""
+        try:
+            with self.watchdog.track('poll', tenant.id):
+                homeworks = await self.poll_tenant(tenant)
+        except CircuitOpenError as error:
+            delay = self.scheduler.record_error(
+                tenant.id, paused_delay(error)
+            )
+        except Exception as error:
+            await self.handle_error(tenant, error)
+            delay = self.scheduler.record_error(tenant.id)
+        else:
+            await self.report(tenant, resolved_message(tenant, self.errors))
+            delay = self.scheduler.record(tenant.id, homeworks)
+        save_due(tenant, delay, self.store)
+        self.watchdog.heartbeat()
+
+    async def _poll_all(self, tenants) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(
+            *(self.poll_scheduled(tenant) for tenant in tenants)
+        )
+        if self.store is not None:
+            self.store.flush()
+
+    async def run_cycle(self) -> None:
+        """Poll all tenants once, at most `concurrency` requests at a time."""
+        await self._poll_all(self.tenants)
+
+    async def run_due(self) -> None:
+        """Poll tenants whose scheduled time has come."""
+        await self._poll_all(
+            self._tenants[tenant_id] for tenant_id in self.scheduler.pop_due()
+        )
+
+    def stop(self) -> None:
+        """Stop polling; safe to call from signal handler or other thread."""
+        self._stopping = True
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def submit(self, function) -> None:
+        """Call function in poll loop between polls; safe from any thread."""
+        self._calls.put(function)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def run_calls(self) -> None:
+        """Call functions passed to submit()."""
+        while True:
+            try:
+                function = self._calls.get_nowait()
+            except queue.Empty:
+                return
+            function()
+
+    def update_tenants(self, tenants: list) -> None:
+        """Replace roster without touching unchanged tenants."""
+        self.tenants = reconcile_tenants(
+            self._tenants, tenants, self.scheduler, self.store
+        )
+
+    async def run_forever(self) -> None:
+        """Poll tenants as scheduler decides until stop() is called."""
+        own_session = self.session is None
+        if own_session:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(
+                    connect=self.timeout[0], sock_read=self.timeout[1]
+                ),
+            )
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        try:
+            while not self._stopping:
+                self.run_calls()
+                await self.run_due()
+                sleep_time = self.scheduler.sleep_time()
+                self.watchdog.heartbeat(sleep_time, self.scheduler.lag())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), sleep_time)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+        finally:
+            if own_session:
+                await self.session.close()
@@ -0,0 +1,230 @@
+import json
+import random
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+STATUSES_PATH = '/api/user_api/homework_statuses/'
+STATS_PATH = '/__stats'
+HOMEWORKS_PER_TENANT = 3
+CHURN_TICK = 0.05
+NEXT_STATUSES = {
+    'reviewing': ('approved', 'rejected'),
+    'approved': ('reviewing',),
+    'rejected': ('reviewing',),
+}
+
+
+class FakeServer(ThreadingHTTPServer):
+    """HTTP server with artificial latency and error rate."""
+
+    daemon_threads = True
+
+    def __init__(self, handler, latency: float = 0,
+                 error_rate: float = 0, seed: int = None) -> None:
+        super().__init__(('127.0.0.1', 0), handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def start(self) -> 'FakeServer':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def simulate(self) -> bool:
+        """Sleep for latency and tell whether request must fail."""
+        if self.latency:
+            time.sleep(self.random.expovariate(1 / self.latency))
+        with self.lock:
+            self.requests += 1
+            failed = self.random.random() < self.error_rate
+            self.errors += failed
+        return failed
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def reply(self, status: int, data) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class PracticumHandler(JSONHandler):
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path == STATS_PATH:
+            self.reply(HTTPStatus.OK, self.server.stats())
+            return
+        if url.path != STATUSES_PATH:
+            self.reply(HTTPStatus.NOT_FOUND, {})
+            return
+        if self.server.simulate():
+            self.reply(HTTPStatus.INTERNAL_SERVER_ERROR, {})
+            return
+        token = self.headers.get('Authorization', '').replace('OAuth ', '')
+        from_date = int(parse_qs(url.query).get('from_date', ['0'])[0])
+        self.reply(HTTPStatus.OK, {
+            'homeworks': self.server.homeworks(token, from_date),
+            'current_date': int(time.time()),
+        })
+
+
+class FakePracticum(FakeServer):
+    """Practicum API which changes homework statuses of known tokens.
+
+    Every token gets `homeworks` homeworks on first request, after that each
+    tenant changes status of one of them `churn` times per second on average.
+    """
+
+    def __init__(self, latency: float = 0, error_rate: float = 0,
+                 churn: float = 0, homeworks: int = HOMEWORKS_PER_TENANT,
+                 seed: int = None) -> None:
+        super().__init__(PracticumHandler, latency, error_rate, seed)
+        self.churn = churn
+        self.homeworks_per_tenant = homeworks
+        self.tenants = {}
+        self.changes = []
+        self._stopped = threading.Event()
+
+    def start(self) -> 'FakePracticum':
+        super().start()
+        if self.churn:
+            threading.Thread(target=self._churn, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        super().stop()
+
+    def homeworks(self, token: str, from_date: int) -> list:
+        with self.lock:
+            homeworks = self.tenants.get(token)
+            if homeworks is None:
+                now = time.time()
+                homeworks = self.tenants[token] = [
+                    {
+                        'id': number,
+                        'homework_name': f'hw_{number}',
+                        'status': 'reviewing',
+                        'updated': now,
+                    }
+                    for number in range(self.homeworks_per_tenant)
+                ]
+            return [
+                {
+                    'id': homework['id'],
+                    'homework_name': homework['homework_name'],
+                    'status': homework['status'],
+                    'reviewer_comment': '',
+                    'date_updated': time.strftime(
+                        '%Y-%m-%dT%H:%M:%SZ', time.gmtime(homework['updated'])
+                    ),
+                    'lesson_name': homework['homework_name'],
+                }
+                for homework in homeworks
+                if homework['updated'] >= from_date
+            ]
+
+    def _churn(self) -> None:
+        while not self._stopped.wait(CHURN_TICK):
+            with self.lock:
+                now = time.time()
+                for token, homeworks in self.tenants.items():
+                    if self.random.random() >= self.churn * CHURN_TICK:
+                        continue
+                    homework = self.random.choice(homeworks)
+                    homework['status'] = self.random.choice(
+                        NEXT_STATUSES[homework['status']]
+                    )
+                    homework['updated'] = now
+                    self.changes.append(
+                        (token, homework['homework_name'],
+                         homework['status'], now)
+                    )
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'changes': list(self.changes),
+            }
+
+
+class TelegramHandler(JSONHandler):
+
+    def do_GET(self) -> None:
+        if urlparse(self.path).path == STATS_PATH:
+            self.reply(HTTPStatus.OK, self.server.stats())
+        else:
+            self.reply(HTTPStatus.NOT_FOUND, {'ok': False})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get('Content-Length', 0))
+        data = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.endswith('/sendMessage'):
+            self.reply(HTTPStatus.NOT_FOUND, {'ok': False})
+            return
+        if self.server.simulate():
+            self.reply(HTTPStatus.TOO_MANY_REQUESTS, {
+                'ok': False,
+                'error_code': HTTPStatus.TOO_MANY_REQUESTS,
+                'description': 'Too Many Requests: retry after 1',
+                'parameters': {'retry_after': 1},
+            })
+            return
+        message_id = self.server.record(data['chat_id'], data['text'])
+        self.reply(HTTPStatus.OK, {'ok': True, 'result': {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': data['chat_id'], 'type': 'private'},
+            'text': data['text'],
+        }})
+
+
+class FakeTelegram(FakeServer):
+    """Telegram Bot API which records sent messages.
+
+    Failed requests are answered with 429 and `retry_after`, like Telegram
+    does when bot exceeds its limits.
+    """
+
+    def __init__(self, latency: float = 0, error_rate: float = 0,
+                 seed: int = None) -> None:
+        super().__init__(TelegramHandler, latency, error_rate, seed)
+        self.sent = []
+
+    def record(self, chat_id, text: str) -> int:
+        with self.lock:
+            self.sent.append((chat_id, text, time.time()))
+            return len(self.sent)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'sent': list(self.sent),
+            }
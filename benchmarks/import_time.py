@@ -0,0 +1,80 @@
+"""Measure how long it takes to import the bot and enforce a budget.
+
+    python -m benchmarks.import_time --runs 10 --budget 0.1
+
+Every run imports the module in a fresh interpreter, so nothing is cached
+in `sys.modules`. Exit status is 1 when the median is over budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODULE = 'homework'
+RUNS = 10
+BUDGET = 0.1
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(elapsed, ','.join(sorted(sys.modules)))
+'''
+
+
+def import_once(module: str = MODULE) -> tuple:
+    """Import module in fresh interpreter, return seconds and modules."""
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(module=module)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    elapsed, modules = output.split()
+    return float(elapsed), set(modules.split(','))
+
+
+def measure(module: str = MODULE, runs: int = RUNS) -> dict:
+    """Return median and worst import time of module over runs."""
+    times = []
+    modules = set()
+    for _ in range(runs):
+        elapsed, modules = import_once(module)
+        times.append(elapsed)
+    return {
+        'module': module,
+        'runs': runs,
+        'median': statistics.median(times),
+        'max': max(times),
+        'modules': len(modules),
+    }
+
+
+def main(argv: list = None) -> int:
+    """Parse arguments, measure import time and compare it with budget."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--module', default=MODULE)
+    parser.add_argument('--runs', type=int, default=RUNS)
+    parser.add_argument(
+        '--budget', type=float, default=BUDGET,
+        help='maximum median import time in seconds',
+    )
+    args = parser.parse_args(argv)
+
+    results = measure(args.module, args.runs)
+    results['budget'] = args.budget
+    print(json.dumps(results, indent=2))
+    if results['median'] > args.budget:
+        print(
+            f'Import of {args.module} takes {results["median"]:.3f}s, '
+            f'budget is {args.budget:.3f}s',
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Replay captured Practicum traffic through the bot pipeline offline.
+
+Capture traffic by running the bot with RECORD_TRAFFIC=capture.jsonl, then
+
+    python -m benchmarks.replay capture.jsonl --output replay.json
+    python -m benchmarks.replay capture.jsonl --realtime --profile 30
+"""
+import argparse
+import cProfile
+import json
+import logging
+import math
+import pstats
+import sys
+import time
+from collections import deque
+
+from breaker import CircuitBreaker
+from poller import Poller
+from response_cache import ResponseCache
+from tenants import Tenant
+from traffic import read_capture
+
+
+class ReplayResponse:
+    """Recorded Practicum response which looks like `requests.Response`."""
+
+    def __init__(self, record: dict, url: str) -> None:
+        self.url = url
+        self.status_code = record['status']
+        self.headers = record.get('headers', {})
+        self.content = record['body'].encode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self) -> None:
+        pass
+
+
+class ReplayClient:
+    """Practicum client which answers with recorded responses.
+
+    Tenant ids are used as tokens, so each tenant gets its own responses
+    in recorded order. With `realtime` every answer takes as long as it
+    took when it was recorded.
+    """
+
+    def __init__(self, records: list, realtime: bool = False) -> None:
+        self.realtime = realtime
+        self._responses = {}
+        for record in records:
+            self._responses.setdefault(record['tenant'], deque()).append(
+                record
+            )
+
+    def get(self, url: str, headers: dict = None, params: dict = None,
+            **kwargs) -> ReplayResponse:
+        record = self._responses[headers['Authorization'].split()[-1]]
+        record = record.popleft()
+        if self.realtime:
+            time.sleep(record['elapsed'])
+        return ReplayResponse(record, url)
+
+
+class CountingBot:
+    """Telegram bot which only counts messages."""
+
+    def __init__(self) -> None:
+        self.sent = 0
+
+    def send_message(self, chat_id, text: str, **kwargs) -> None:
+        self.sent += 1
+
+
+def replay(records: list, realtime: bool = False, stream: bool = False,
+           cache: bool = False) -> dict:
+    """Poll tenants with recorded responses in recorded order."""
+    polls = [
+        record for record in records
+        if record['kind'] == 'practicum' and record.get('tenant')
+    ]
+    tenants = {}
+    for record in polls:
+        tenant_id = record['tenant']
+        if tenant_id not in tenants:
+            tenants[tenant_id] = Tenant(tenant_id, tenant_id, tenant_id)
+    bot = CountingBot()
+    # Breaker never opens, so every recorded response is consumed in turn.
+    poller = Poller(
+        bot, list(tenants.values()), stream=stream,
+        cache=ResponseCache() if cache else None,
+        breaker=CircuitBreaker(failure_threshold=math.inf),
+        client=ReplayClient(polls, realtime),
+    )
+
+    started = time.monotonic()
+    for record in polls:
+        if realtime:
+            time.sleep(max(0.0, started + record['t'] - time.monotonic()))
+        poller.poll_scheduled(tenants[record['tenant']])
+    elapsed = time.monotonic() - started
+    return {
+        'tenants': len(tenants),
+        'polls': len(polls),
+        'elapsed': elapsed,
+        'polls_per_second': len(polls) / elapsed if elapsed else None,
+        'sends': bot.sent,
+        'recorded_sends': sum(
+            record['kind'] == 'telegram' for record in records
+        ),
+    }
+
+
+def main(argv: list = None) -> int:
+    """Parse arguments, replay capture and print results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('capture')
+    parser.add_argument('--realtime', action='store_true')
+    parser.add_argument('--stream', action='store_true')
+    parser.add_argument('--cache', action='store_true')
+    parser.add_argument(
+        '--profile', type=int, metavar='LINES',
+        help='profile replay and print slowest functions',
+    )
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    records = list(read_capture(args.capture))
+    profile = cProfile.Profile() if args.profile else None
+    if profile is not None:
+        profile.enable()
+    results = replay(records, args.realtime, args.stream, args.cache)
+    if profile is not None:
+        profile.disable()
+        pstats.Stats(profile, stream=sys.stderr).sort_stats(
+            'cumulative'
+        ).print_stats(args.profile)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""Load test of the bot against local Practicum and Telegram stand-ins.
+
+    python -m benchmarks.run_bench --tenants 1000 --duration 60 \
+        --output bench_results.json --baseline previous.json
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import requests
+import telegram
+from telegram.utils.request import Request
+
+import async_poller
+import homework
+from async_poller import AsyncPoller
+from benchmarks.fake_servers import (
+    STATS_PATH,
+    STATUSES_PATH,
+    FakePracticum,
+    FakeTelegram,
+)
+from outbox import DIGEST_SEPARATOR, WORKERS, Outbox
+from poller import Poller
+from scheduler import PollScheduler
+from state import MemoryStateStore
+from tenants import Tenant
+
+TELEGRAM_TOKEN = '123456:BENCHMARK'
+DRAIN_TIMEOUT = 10
+REGRESSION_TOLERANCE = 0.2
+HIGHER_IS_BETTER = ('polls_per_second', 'sends_per_second')
+LOWER_IS_BETTER = ('latency_p50', 'latency_p99', 'rss_mb', 'cpu_seconds')
+
+
+def serve(config: dict, urls, stop) -> None:
+    """Run fake servers in separate process until `stop` is set."""
+    practicum = FakePracticum(
+        latency=config['practicum_latency'],
+        error_rate=config['practicum_error_rate'],
+        churn=config['churn'], seed=config['seed'],
+    ).start()
+    telegram_api = FakeTelegram(
+        latency=config['telegram_latency'],
+        error_rate=config['telegram_error_rate'], seed=config['seed'],
+    ).start()
+    urls.put((practicum.url, telegram_api.url))
+    stop.wait()
+    practicum.stop()
+    telegram_api.stop()
+
+
+def percentile(values: list, share: float):
+    """Return value below which `share` of sorted values lie."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def notification_latencies(changes: list, sent: list, chat_ids: dict) -> list:
+    """Match status changes with first message about them sent after."""
+    statuses = {
+        verdict: status
+        for status, verdict in homework.HOMEWORK_VERDICTS.items()
+    }
+    sent_at = {}
+    for chat_id, digest, timestamp in sent:
+        for text in digest.split(DIGEST_SEPARATOR):
+            name = text.split('"')[1] if text.count('"') >= 2 else None
+            status = next(
+                (statuses[verdict] for verdict in statuses
+                 if text.endswith(verdict)), None
+            )
+            sent_at.setdefault(
+                (str(chat_id), name, status), []
+            ).append(timestamp)
+
+    latencies = []
+    for token, name, status, changed in changes:
+        times = sorted(
+            sent_at.get((str(chat_ids[token]), name, status), [])
+        )
+        position = bisect.bisect_left(times, changed)
+        if position < len(times):
+            latencies.append(times[position] - changed)
+    return sorted(latencies)
+
+
+def drive_sync(poller: Poller, deadline: float) -> None:
+    while time.monotonic() < deadline:
+        poller.run_due()
+        time.sleep(min(poller.scheduler.sleep_time(), 0.05))
+
+
+async def drive_async(poller: AsyncPoller, deadline: float) -> None:
+    import aiohttp
+
+    async with aiohttp.ClientSession() as session:
+        poller.session = session
+        while time.monotonic() < deadline:
+            await poller.run_due()
+            await asyncio.sleep(min(poller.scheduler.sleep_time(), 0.05))
+
+
+def run_benchmark(tenants: int = 100, duration: float = 10,
+                  poll_interval: float = 1, mode: str = 'sync',
+                  practicum_latency: float = 0.02,
+                  practicum_error_rate: float = 0, churn: float = 0.05,
+                  telegram_latency: float = 0.02,
+                  telegram_error_rate: float = 0, seed: int = 0) -> dict:
+    """Run the bot for `duration` seconds and return measured results."""
+    config = dict(locals())
+    context = multiprocessing.get_context('spawn')
+    urls, stop = context.Queue(), context.Event()
+    server = context.Process(target=serve, args=(config, urls, stop))
+    server.start()
+    endpoint = homework.ENDPOINT
+    try:
+        practicum_url, telegram_url = urls.get(timeout=30)
+        homework.ENDPOINT = async_poller.ENDPOINT = (
+            practicum_url + STATUSES_PATH
+        )
+
+        roster = [Tenant(f'token-{number}', number)
+                  for number in range(tenants)]
+        chat_ids = {tenant.token: tenant.chat_id for tenant in roster}
+        scheduler = PollScheduler(
+            min_interval=poll_interval, reviewing_interval=poll_interval,
+            base_interval=poll_interval, max_interval=poll_interval,
+            budget=tenants * 10,
+        )
+        store = MemoryStateStore()
+        bot = telegram.Bot(
+            TELEGRAM_TOKEN, base_url=telegram_url + '/bot',
+            request=Request(con_pool_size=WORKERS),
+        )
+        outbox = Outbox(bot, store)
+        outbox.start()
+
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        started = time.monotonic()
+        deadline = started + duration
+        if mode == 'async':
+            poller = AsyncPoller(
+                TELEGRAM_TOKEN, roster, store=store, scheduler=scheduler,
+                outbox=outbox,
+            )
+            asyncio.run(drive_async(poller, deadline))
+        else:
+            poller = Poller(
+                bot, roster, store=store, scheduler=scheduler, outbox=outbox
+            )
+            drive_sync(poller, deadline)
+        drain_deadline = time.monotonic() + DRAIN_TIMEOUT
+        while len(outbox) and time.monotonic() < drain_deadline:
+            time.sleep(0.05)
+        elapsed = time.monotonic() - started
+        outbox.stop()
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+
+        practicum_stats = requests.get(practicum_url + STATS_PATH).json()
+        telegram_stats = requests.get(telegram_url + STATS_PATH).json()
+    finally:
+        homework.ENDPOINT = async_poller.ENDPOINT = endpoint
+        stop.set()
+        server.join()
+
+    latencies = notification_latencies(
+        practicum_stats['changes'], telegram_stats['sent'], chat_ids
+    )
+    cpu_seconds = (
+        usage.ru_utime - usage_before.ru_utime
+        + usage.ru_stime - usage_before.ru_stime
+    )
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    rss_unit = 1 if sys.platform == 'darwin' else 1024
+    return {
+        'config': config,
+        'elapsed': elapsed,
+        'polls': practicum_stats['requests'],
+        'polls_per_second': practicum_stats['requests'] / elapsed,
+        'practicum_errors': practicum_stats['errors'],
+        'sends': len(telegram_stats['sent']),
+        'sends_per_second': len(telegram_stats['sent']) / elapsed,
+        'telegram_errors': telegram_stats['errors'],
+        'status_changes': len(practicum_stats['changes']),
+        'notified_changes': len(latencies),
+        'latency_p50': percentile(latencies, 0.5),
+        'latency_p99': percentile(latencies, 0.99),
+        'rss_mb': usage.ru_maxrss * rss_unit / 2 ** 20,
+        'cpu_seconds': cpu_seconds,
+        'cpu_percent': 100 * cpu_seconds / elapsed,
+    }
+
+
+def regressions(results: dict, baseline: dict,
+                tolerance: float = REGRESSION_TOLERANCE) -> list:
+    """Return descriptions of metrics which got worse than baseline."""
+    found = []
+    for key in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+        new, old = results.get(key), baseline.get(key)
+        if not new or not old:
+            continue
+        change = (new - old) / old
+        if key in HIGHER_IS_BETTER:
+            change = -change
+        if change > tolerance:
+            found.append(f'{key}: {old:.3f} -> {new:.3f}')
+    return found
+
+
+def main(argv: list = None) -> int:
+    """Parse arguments, run benchmark and save results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--poll-interval', type=float, default=1)
+    parser.add_argument('--mode', choices=('sync', 'async'), default='sync')
+    parser.add_argument('--practicum-latency', type=float, default=0.02)
+    parser.add_argument('--practicum-error-rate', type=float, default=0)
+    parser.add_argument('--churn', type=float, default=0.05)
+    parser.add_argument('--telegram-latency', type=float, default=0.02)
+    parser.add_argument('--telegram-error-rate', type=float, default=0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline')
+    args = vars(parser.parse_args(argv))
+    output, baseline = args.pop('output'), args.pop('baseline')
+
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    results = run_benchmark(**args)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+    print(json.dumps(
+        {key: value for key, value in results.items() if key != 'config'},
+        indent=2,
+    ))
+
+    if baseline and os.path.exists(baseline):
+        with open(baseline, encoding='utf-8') as file:
+            found = regressions(results, json.load(file))
+        for line in found:
+            print(f'Regression {line}', file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import logging
+import threading
+import time
+
+from exeption import CircuitOpenError, HTTPStatusError
+from ratelimit import backoff_delay
+
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30
+MAX_RESET_TIMEOUT = 600
+HALF_OPEN_PROBES = 1
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+def is_outage(error: Exception) -> bool:
+    """Tell whether error means API is down, not that request was wrong."""
+    if isinstance(error, HTTPStatusError):
+        return error.status_code >= 500
+    return isinstance(error, OSError)
+
+
+class CircuitBreaker:
+    """Circuit breaker shared by all requests to Practicum API.
+
+    After `failure_threshold` outage errors in a row the circuit opens and
+    requests fail fast with `CircuitOpenError`. When the pause is over, up to
+    `probes` requests are let through: success closes the circuit, failure
+    opens it again for a longer pause with full jitter.
+    """
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD,
+                 reset_timeout: float = RESET_TIMEOUT,
+                 max_reset_timeout: float = MAX_RESET_TIMEOUT,
+                 probes: int = HALF_OPEN_PROBES,
+                 clock=time.monotonic) -> None:
+        """Start closed breaker with thresholds of failures."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.probes = probes
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_until = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    def retry_after(self) -> float:
+        """Return seconds until circuit lets probe requests through."""
+        return max(0.0, self.opened_until - self.clock())
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.trips += 1
+        pause = self.reset_timeout + backoff_delay(
+            self.trips - 1, self.reset_timeout, self.max_reset_timeout
+        )
+        self.opened_until = self.clock() + pause
+        logging.error(
+            'Practicum API is unavailable, requests paused for %.0f s', pause)
+
+    def __enter__(self) -> 'CircuitBreaker':
+        """Let request pass or raise CircuitOpenError."""
+        with self._lock:
+            if self.state == OPEN and self.retry_after() == 0:
+                self.state = HALF_OPEN
+                self._probes_in_flight = 0
+            if self.state == OPEN or (
+                self.state == HALF_OPEN
+                and self._probes_in_flight >= self.probes
+            ):
+                raise CircuitOpenError(
+                    self.retry_after() if self.state == OPEN
+                    else self.reset_timeout
+                )
+            if self.state == HALF_OPEN:
+                self._probes_in_flight += 1
+        return self
+
+    def __exit__(self, exc_type, error, traceback) -> bool:
+        """Count outage of request and switch state."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes_in_flight -= 1
+            if error is None or not is_outage(error):
+                if self.state != CLOSED:
+                    logging.info('Practicum API is available again')
+                self.state = CLOSED
+                self.failures = 0
+                self.trips = 0
+            elif self.state == HALF_OPEN:
+                self._open()
+            elif self.state == CLOSED:
+                self.failures += 1
+                if self.failures >= self.failure_threshold:
+                    self._open()
+        return False
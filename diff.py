@@ -0,0 +1,92 @@
+import zlib
+from abc import ABC, abstractmethod
+
+from homework import parse_status
+from models import Homework
+
+
+def fingerprint(homework: Homework) -> tuple:
+    """Return compact (status, comment checksum) of homework.
+
+    Comment is kept only as CRC32, so snapshot of a tenant stays small
+    however long reviewer comments are. `date_updated` is left out: its
+    change alone is not an event, so snapshot would never catch up with it.
+    """
+    return (
+        homework.status,
+        zlib.crc32((homework.reviewer_comment or '').encode()),
+    )
+
+
+class HomeworkEvent(ABC):
+    """Change of homework found by comparing response with snapshot."""
+
+    __slots__ = ('key', 'homework', 'fingerprint', 'old')
+
+    def __init__(self, key: str, homework: Homework, new: tuple,
+                 old: tuple = None) -> None:
+        """Keep homework and its new and old fingerprints."""
+        self.key = key
+        self.homework = homework
+        self.fingerprint = new
+        self.old = old
+
+    def __repr__(self) -> str:
+        """Show kind, key and fingerprint of event."""
+        return f'{type(self).__name__}({self.key!r}, {self.fingerprint!r})'
+
+    @abstractmethod
+    def message(self) -> str:
+        """Return text of notification about event."""
+
+
+class StatusChanged(HomeworkEvent):
+    """Homework appeared or changed status, e.g. reviewing→approved."""
+
+    __slots__ = ()
+
+    @property
+    def old_status(self):
+        """Status before event or None for new homework."""
+        return None if self.old is None else self.old[0]
+
+    @property
+    def new_status(self):
+        """Status after event."""
+        return self.fingerprint[0]
+
+    def message(self) -> str:
+        """Return text of notification about event."""
+        return parse_status(self.homework)
+
+
+class CommentChanged(HomeworkEvent):
+    """Reviewer changed comment without changing status."""
+
+    __slots__ = ()
+
+    def message(self) -> str:
+        """Return text of notification about event."""
+        return (
+            f'Ревьюер изменил комментарий к работе '
+            f'"{self.homework.homework_name}": '
+            f'{self.homework.reviewer_comment}'
+        )
+
+
+def diff(snapshot: dict, homeworks: list):
+    """Yield events of homeworks which changed since snapshot.
+
+    Snapshot maps homework key to fingerprint and is not modified; caller
+    records fingerprint of event once it is handled.
+    """
+    for homework in homeworks:
+        key = homework.key
+        new = fingerprint(homework)
+        old = snapshot.get(key)
+        if old == new:
+            continue
+        if old is None or old[0] != new[0]:
+            yield StatusChanged(key, homework, new, old)
+        elif old[1] != new[1]:
+            yield CommentChanged(key, homework, new, old)
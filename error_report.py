@@ -0,0 +1,122 @@
+import re
+import time
+from collections import OrderedDict
+
+from metrics import POLL_ERRORS
+
+ERROR_WINDOW = 3600
+MAX_ENTRIES = 10000
+
+# Parts of error message which differ between occurrences of one error,
+# e.g. `from_date` in URL or status code.
+VARIABLE_PARTS = re.compile(r'https?://\S+|0x[0-9a-fA-F]+|\d+')
+
+
+def fingerprint(error: Exception) -> str:
+    """Return type of error with its message stripped of variable parts."""
+    return f'{type(error).__name__}: {VARIABLE_PARTS.sub("#", str(error))}'
+
+
+class ErrorEntry:
+    """Occurrences of one error of one tenant.
+
+    Only text of the last error is kept: the exception itself would keep
+    its traceback with frames of the failed poll, e.g. an open response.
+    """
+
+    __slots__ = ('count', 'reported', 'reported_at', 'last_seen', 'error')
+
+    def __init__(self, now: float, error: str) -> None:
+        """Start entry with text of first error."""
+        self.count = 0
+        self.reported = 0
+        self.reported_at = now
+        self.last_seen = now
+        self.error = error
+
+
+class ErrorAggregator:
+    """Count errors of tenants by fingerprint and decide which to report.
+
+    New error is reported right away, its repeats - as one summary per
+    `window`. When tenant is polled successfully again, reported errors
+    are resolved. Errors not seen for `window` are forgotten and at most
+    `max_entries` of them are kept.
+    """
+
+    def __init__(self, window: float = ERROR_WINDOW,
+                 max_entries: int = MAX_ENTRIES,
+                 clock=time.monotonic) -> None:
+        """Prepare empty aggregator with time window."""
+        self.window = window
+        self.max_entries = max_entries
+        self.clock = clock
+        # (tenant id, fingerprint) -> ErrorEntry, least recently seen first.
+        self._entries = OrderedDict()
+        self._tenants = {}
+
+    def __len__(self) -> int:
+        """Return number of tracked errors."""
+        return len(self._entries)
+
+    def record(self, tenant_id: str, error: Exception):
+        """Count error of tenant and return message about it or None."""
+        now = self.clock()
+        self._expire(now)
+        key = (tenant_id, fingerprint(error))
+        entry = self._entries.pop(key, None)
+        new = entry is None
+        if new:
+            entry = ErrorEntry(now, str(error))
+            self._tenants.setdefault(tenant_id, set()).add(key[1])
+        entry.count += 1
+        entry.last_seen = now
+        entry.error = str(error)
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._forget(*self._entries.popitem(last=False)[0])
+
+        if new:
+            message = f'Program error: {error}'
+        elif now - entry.reported_at >= self.window:
+            message = (
+                f'Program error repeated {entry.count - entry.reported} '
+                f'times in {(now - entry.reported_at) / 60:.0f} min: {error}'
+            )
+        else:
+            POLL_ERRORS.inc(result='suppressed')
+            return None
+        entry.reported = entry.count
+        entry.reported_at = now
+        POLL_ERRORS.inc(result='reported')
+        return message
+
+    def resolve(self, tenant_id: str):
+        """Forget errors of tenant and return message about them or None."""
+        fingerprints = self._tenants.pop(tenant_id, None)
+        if not fingerprints:
+            return None
+        entries = [
+            self._entries.pop((tenant_id, key)) for key in fingerprints
+        ]
+        count = sum(entry.count for entry in entries)
+        errors = '; '.join(
+            entry.error
+            for entry in sorted(entries, key=lambda entry: entry.last_seen)
+        )
+        return f'Program error resolved after {count} failures: {errors}'
+
+    def _expire(self, now: float) -> None:
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry.last_seen < self.window:
+                break
+            del self._entries[key]
+            self._forget(*key)
+
+    def _forget(self, tenant_id: str, key: str) -> None:
+        fingerprints = self._tenants.get(tenant_id)
+        if fingerprints is not None:
+            fingerprints.discard(key)
+            if not fingerprints:
+                del self._tenants[tenant_id]
@@ -1,8 +1,21 @@
 
 class HTTPStatusError(Exception):
     def __init__(self, response):
+        status_code = getattr(response, 'status_code', None)
+        if status_code is None:
+            status_code = response.status
+        self.status_code = status_code
         message = (
             f'Not available ENDPOINT:{response.url}.'
-            f'Status code: {response.status_code}'
+            f'Status code: {status_code}'
         )
         super().__init__(message)
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        super().__init__(
+            f'Requests to API are paused for {retry_after:.0f} s '
+            'after repeated failures'
+        )
@@ -0,0 +1,73 @@
+import logging
+import os
+import threading
+
+WATCH_INTERVAL = 5
+
+
+def file_state(path: str):
+    """Return modification time and size of file or None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileWatcher:
+    """Call `callback` when any of watched files changes.
+
+    Files are checked by modification time and size every `interval`
+    seconds, which works on every platform and filesystem.
+    """
+
+    def __init__(self, paths: list, callback,
+                 interval: float = WATCH_INTERVAL) -> None:
+        """Remember current state of watched files."""
+        self.callback = callback
+        self.interval = interval
+        self._states = {}
+        self._stopped = threading.Event()
+        self._thread = None
+        self.watch(paths)
+
+    def watch(self, paths: list) -> None:
+        """Watch `paths` instead of files watched before."""
+        self._states = {
+            path: self._states.get(path, file_state(path))
+            for path in paths if path
+        }
+
+    def check(self) -> list:
+        """Return changed files and call `callback` if there are some."""
+        changed = []
+        for path, state in list(self._states.items()):
+            current = file_state(path)
+            if current != state:
+                self._states[path] = current
+                changed.append(path)
+        if changed:
+            logging.info('Changed files: %s', ', '.join(changed))
+            self.callback(changed)
+        return changed
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as error:
+                logging.error('Failed to check watched files: %s', error)
+
+    def start(self) -> None:
+        """Check files in background thread."""
+        self._thread = threading.Thread(
+            target=self._watch, name='file-watch', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop checking files."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,139 @@
+import itertools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+
+from admin_server import route
+
+STALL_TIMEOUT = 120
+MAX_LAG = 300
+CHECK_INTERVAL = 5
+
+
+class Watchdog:
+    """Heartbeat of poll loop and in-flight polls and sends.
+
+    Work in flight longer than `stall_timeout` means the worker is wedged,
+    e.g. on a socket which never answers: it is no longer live nor ready,
+    and after twice as long `on_stall` is called to restart it. Worker is
+    ready while poll loop beats and polls are not late by `max_lag`.
+    """
+
+    def __init__(self, stall_timeout: float = STALL_TIMEOUT,
+                 max_lag: float = MAX_LAG, on_stall=None,
+                 clock=time.monotonic) -> None:
+        """Prepare watchdog with stall and lag limits."""
+        self.stall_timeout = stall_timeout
+        self.max_lag = max_lag
+        self.on_stall = on_stall
+        self.clock = clock
+        self.lag = 0.0
+        self.beats = 0
+        # Poll loop is given `stall_timeout` to start.
+        self._alive_until = clock() + stall_timeout
+        self._in_flight = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def heartbeat(self, sleep: float = 0, lag: float = None) -> None:
+        """Note progress of poll loop which sleeps up to `sleep` seconds."""
+        alive_until = self.clock() + sleep + self.stall_timeout
+        with self._lock:
+            self._alive_until = max(self._alive_until, alive_until)
+            self.beats += 1
+            if lag is not None:
+                self.lag = lag
+
+    @contextmanager
+    def track(self, kind: str, name=None):
+        """Note work of kind which is in flight inside the block."""
+        number = next(self._counter)
+        with self._lock:
+            self._in_flight[number] = (kind, name, self.clock())
+        try:
+            yield
+        finally:
+            with self._lock:
+                del self._in_flight[number]
+
+    def stalled(self, timeout: float = None) -> list:
+        """Return work in flight for longer than `timeout` seconds."""
+        if timeout is None:
+            timeout = self.stall_timeout
+        now = self.clock()
+        with self._lock:
+            in_flight = list(self._in_flight.values())
+        return [
+            {'kind': kind, 'name': name, 'seconds': round(now - started, 3)}
+            for kind, name, started in in_flight
+            if now - started > timeout
+        ]
+
+    def liveness(self) -> tuple:
+        """Return whether worker is live and details of its state."""
+        stalled = self.stalled()
+        beating = self.clock() <= self._alive_until
+        return beating and not stalled, {
+            'beating': beating, 'stalled': stalled,
+        }
+
+    def readiness(self) -> tuple:
+        """Return whether worker keeps up with polls and details."""
+        live, details = self.liveness()
+        details['lag'] = round(self.lag, 3)
+        details['started'] = self.beats > 0
+        return live and self.beats > 0 and self.lag <= self.max_lag, details
+
+    def check(self) -> list:
+        """Call `on_stall` with work stuck for twice `stall_timeout`."""
+        stalled = self.stalled(2 * self.stall_timeout)
+        if stalled:
+            logging.critical('Worker is stalled: %s', stalled)
+            if self.on_stall is not None:
+                self.on_stall(stalled)
+        return stalled
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(CHECK_INTERVAL):
+            self.check()
+
+    def start(self) -> None:
+        """Check stalled work in background thread."""
+        self._thread = threading.Thread(
+            target=self._watch, name='watchdog', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop background checks."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def register(self) -> None:
+        """Answer /healthz and /readyz of admin server."""
+        route('/healthz')(self.healthz_page)
+        route('/readyz')(self.readyz_page)
+
+    def healthz_page(self, query: dict) -> tuple:
+        """Answer liveness probe."""
+        return health_page(*self.liveness())
+
+    def readyz_page(self, query: dict) -> tuple:
+        """Answer readiness probe."""
+        return health_page(*self.readiness())
+
+
+def health_page(ok: bool, details: dict) -> tuple:
+    """Return probe answer with status 200 if ok and 503 if not."""
+    details['status'] = 'ok' if ok else 'fail'
+    return (
+        HTTPStatus.OK if ok else HTTPStatus.SERVICE_UNAVAILABLE,
+        'application/json', json.dumps(details) + '\n',
+    )
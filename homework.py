@@ -1,25 +1,123 @@
-import logging.config
+import logging
 import json
-import requests
 import os
+import signal
 import sys
-import telegram
 import time
 
-from dotenv import load_dotenv
 from http import HTTPStatus
+from typing import TYPE_CHECKING
 from exeption import HTTPStatusError
+from http_client import (
+    CONCURRENCY,
+    CONNECT_TIMEOUT,
+    POOL_SIZE,
+    READ_TIMEOUT,
+    PracticumClient,
+)
+from metrics import (
+    PRACTICUM_LATENCY,
+    TELEGRAM_FAILURES,
+    TELEGRAM_LATENCY,
+    UNKNOWN_STATUSES,
+)
+from models import Homework, StatusResponse, StatusStream
+from response_cache import cache_key
 
-load_dotenv()
+if TYPE_CHECKING:
+    import telegram
 
+# Configuration is read by load_config() when the bot starts, so importing
+# this module stays cheap. Values below are defaults.
+PRACTICUM_TOKEN = None
+TELEGRAM_TOKEN = None
+TELEGRAM_CHAT_ID = None
 
-PRACTICUM_TOKEN = os.getenv('TOKEN_YP')
-TELEGRAM_TOKEN = os.getenv('TOKEN_TG')
-TELEGRAM_CHAT_ID = os.getenv('TG_ID')
+TENANTS_FILE = None
+POLL_MODE = 'sync'
+STATE_DB = 'homework_bot.sqlite3'
+ADMIN_PORT = None
+LOG_FORMAT = 'text'
+STREAM_RESPONSES = False
+DIGEST_WINDOW = 2
+DIGEST_SIZE = 10
+RECORD_TRAFFIC = None
+WEBHOOK_PORT = None
+WEBHOOK_HOST = '127.0.0.1'
+WEBHOOK_SECRET = None
+POLL_INTERVAL = 600
+RECONCILE_INTERVAL = 3600
+REQUEST_BUDGET = 10
+TELEGRAM_RATE = 30
+ERROR_WINDOW = 3600
+STALL_TIMEOUT = 120
+MAX_POLL_LAG = 300
+PROFILE_DIR = 'profiles'
+PROFILE_SECONDS = 30
+RELOAD_INTERVAL = 5
+SHARD_NODES = None
+SHARD_ID = None
+SHARD_PROCESSES = 1
+# POOL_SIZE, CONNECT_TIMEOUT, READ_TIMEOUT and CONCURRENCY default to ones
+# of http_client.
+
+
+def flag(value: str) -> bool:
+    """Return whether environment variable turns option on."""
+    return value == '1'
+
+
+# Setting, environment variable it is read from and type of its value.
+SETTINGS = (
+    ('PRACTICUM_TOKEN', 'TOKEN_YP', str),
+    ('TELEGRAM_TOKEN', 'TOKEN_TG', str),
+    ('TELEGRAM_CHAT_ID', 'TG_ID', str),
+    ('TENANTS_FILE', 'TENANTS_FILE', str),
+    ('POLL_MODE', 'POLL_MODE', str),
+    ('STATE_DB', 'STATE_DB', str),
+    ('ADMIN_PORT', 'ADMIN_PORT', str),
+    ('LOG_FORMAT', 'LOG_FORMAT', str),
+    ('STREAM_RESPONSES', 'STREAM_RESPONSES', flag),
+    ('DIGEST_WINDOW', 'DIGEST_WINDOW', float),
+    ('DIGEST_SIZE', 'DIGEST_SIZE', int),
+    ('RECORD_TRAFFIC', 'RECORD_TRAFFIC', str),
+    ('WEBHOOK_PORT', 'WEBHOOK_PORT', str),
+    ('WEBHOOK_HOST', 'WEBHOOK_HOST', str),
+    ('WEBHOOK_SECRET', 'WEBHOOK_SECRET', str),
+    ('POLL_INTERVAL', 'POLL_INTERVAL', float),
+    ('RECONCILE_INTERVAL', 'RECONCILE_INTERVAL', int),
+    ('REQUEST_BUDGET', 'REQUEST_BUDGET', float),
+    ('TELEGRAM_RATE', 'TELEGRAM_RATE', float),
+    ('ERROR_WINDOW', 'ERROR_WINDOW', float),
+    ('STALL_TIMEOUT', 'STALL_TIMEOUT', float),
+    ('MAX_POLL_LAG', 'MAX_POLL_LAG', float),
+    ('PROFILE_DIR', 'PROFILE_DIR', str),
+    ('PROFILE_SECONDS', 'PROFILE_SECONDS', float),
+    ('RELOAD_INTERVAL', 'RELOAD_INTERVAL', float),
+    ('SHARD_NODES', 'SHARD_NODES', str),
+    ('SHARD_ID', 'SHARD_ID', str),
+    ('SHARD_PROCESSES', 'SHARD_PROCESSES', int),
+    ('POOL_SIZE', 'POOL_SIZE', int),
+    ('CONNECT_TIMEOUT', 'CONNECT_TIMEOUT', float),
+    ('READ_TIMEOUT', 'READ_TIMEOUT', float),
+    ('CONCURRENCY', 'CONCURRENCY', int),
+)
+DEFAULTS = {name: globals()[name] for name, _, _ in SETTINGS}
+
+# Settings which running bot can not change, they need restart.
+RESTART_SETTINGS = (
+    'POLL_MODE', 'STATE_DB', 'ADMIN_PORT', 'LOG_FORMAT', 'STREAM_RESPONSES',
+    'RECORD_TRAFFIC', 'WEBHOOK_PORT', 'WEBHOOK_HOST', 'WEBHOOK_SECRET',
+    'PROFILE_DIR', 'RELOAD_INTERVAL', 'SHARD_NODES', 'SHARD_ID',
+    'SHARD_PROCESSES', 'POOL_SIZE', 'CONNECT_TIMEOUT', 'READ_TIMEOUT',
+    'CONCURRENCY',
+)
 
 RETRY_TIME = 600
+SHUTDOWN_TIMEOUT = 20
+EXIT_STALLED = 75
+CHUNK_SIZE = 16 * 1024
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
 # Привет!
 # Код писался по уже готовому шаблону от YP и часть переменных и функций были
@@ -31,33 +129,126 @@ HOMEWORK_VERDICTS = {
 }
 
 
-def send_message(bot: telegram.Bot, message: str) -> None:
+def env_file() -> str:
+    """Return path of `.env` file or empty string if there is none."""
+    from dotenv import find_dotenv
+
+    return find_dotenv()
+
+
+def read_config() -> dict:
+    """Return settings from environment variables and `.env` file.
+
+    Environment variables win over the file, missing ones get defaults.
+    """
+    from dotenv import dotenv_values
+
+    path = env_file()
+    environment = {**(dotenv_values(path) if path else {}), **os.environ}
+    config = {}
+    for name, variable, cast in SETTINGS:
+        value = environment.get(variable)
+        config[name] = DEFAULTS[name] if value is None else cast(value)
+    return config
+
+
+def load_config() -> None:
+    """Read configuration from `.env` file and environment variables."""
+    globals().update(read_config())
+
+
+def send_message(bot: 'telegram.Bot', message: str) -> None:
     """Send message in Telegram bot."""
+    send_message_to_chat(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_message_to_chat(bot: 'telegram.Bot', chat_id,
+                         message: str) -> None:
+    """Send message in Telegram chat with given id."""
+    started = time.monotonic()
     try:
         logging.info('The start of sending the message')
-        bot.send_message(TELEGRAM_CHAT_ID, message)
+        bot.send_message(chat_id, message)
     except Exception as error:
-        message_err = f'''Error sending messages: {message}
-        to telegram chat with id: {TELEGRAM_CHAT_ID} - {error}.'''
-        logging.error(message_err)
-        raise KeyError(message_err)
+        TELEGRAM_FAILURES.inc(reason='error')
+        message_err = (
+            'Error sending messages: %s to telegram chat with id: %s - %s.'
+        )
+        logging.error(message_err, message, chat_id, error)
+        raise KeyError(message_err % (message, chat_id, error))
     else:
-        logging.info('The message successfully sent')
+        latency = time.monotonic() - started
+        TELEGRAM_LATENCY.observe(latency)
+        logging.info(
+            'The message successfully sent', extra={'latency': latency}
+        )
 
 
 def get_api_answer(current_timestamp: int) -> dict:
     """Send request to API and get response."""
+    return fetch_homework_statuses(
+        {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}, current_timestamp
+    )
+
+
+def request_homework_statuses(headers: dict, current_timestamp: int,
+                              stream: bool = False, cache=None, client=None):
+    """Send request to API and return response with status 200.
+
+    `client` has `get` like `requests.get`, e.g. pooled PracticumClient;
+    bare `requests` is used without it. With ResponseCache return None when
+    response repeats the previous one.
+    """
     timestamp = current_timestamp or int(time.time())
     params = {'from_date': timestamp}
+    key = cache_key(headers, timestamp)
+    if cache is not None:
+        headers = {**headers, **cache.conditional_headers(key)}
+
+    options = {}
+    if client is None:
+        import requests as client
 
-    response = requests.get(ENDPOINT, headers=HEADERS, params=params)
+        # PracticumClient applies its own timeouts, bare requests has none.
+        options['timeout'] = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    started = time.monotonic()
+    try:
+        response = client.get(
+            ENDPOINT, headers=headers, params=params, stream=stream,
+            **options,
+        )
+    except Exception:
+        PRACTICUM_LATENCY.observe(time.monotonic() - started, status='error')
+        raise
+    PRACTICUM_LATENCY.observe(
+        time.monotonic() - started, status=int(response.status_code)
+    )
 
+    if cache is not None and response.status_code in (
+        HTTPStatus.OK, HTTPStatus.NOT_MODIFIED
+    ):
+        if cache.unchanged(key, response, read_body=not stream):
+            response.close()
+            return None
     if response.status_code != HTTPStatus.OK:
         logging.error(
-            f'Not available ENDPOINT:{ENDPOINT}.'
-            f'Status code: {response.status_code}')
+            'Not available ENDPOINT:%s.Status code: %s',
+            ENDPOINT, response.status_code)
         raise HTTPStatusError(response)
+    return response
+
+
+def fetch_homework_statuses(headers: dict, current_timestamp: int,
+                            cache=None, client=None) -> dict:
+    """Send request to API with given headers and get response.
 
+    With ResponseCache return None when response repeats the previous one.
+    """
+    response = request_homework_statuses(
+        headers, current_timestamp, cache=cache, client=client
+    )
+    if response is None:
+        return None
     try:
         return response.json()
     except json.decoder.JSONDecodeError:
@@ -66,46 +257,52 @@ def get_api_answer(current_timestamp: int) -> dict:
         raise KeyError(message)
 
 
-def check_response(response: dict) -> list:
-    """Check response from API."""
-    if not isinstance(response, dict):
-        message = f'Expected type data - dict, received - {type(response)}'
-        logging.error(message)
-        raise TypeError(message)
+def stream_homework_statuses(headers: dict, current_timestamp: int,
+                             cache=None, client=None) -> StatusStream:
+    """Send request to API and decode homeworks while body is received."""
+    response = request_homework_statuses(
+        headers, current_timestamp, stream=True, cache=cache, client=client
+    )
+    if response is None:
+        return None
 
-    if response == {}:
-        message = 'Response contains empty dict'
-        logging.error(message)
-        raise KeyError(message)
+    def chunks():
+        try:
+            yield from response.iter_content(CHUNK_SIZE)
+        finally:
+            response.close()
 
-    if not isinstance(response.get('homeworks'), list):
-        type_responce = type(response.get('homeworks'))
-        message = f'Expected type data - list, received - {type_responce}'
-        logging.error(message)
-        raise TypeError(message)
+    return StatusStream(chunks())
 
-    if ('current_date' not in response) and ('homeworks' not in response):
-        message = 'Missing expected keys in API response'
-        logging.error(message)
-        raise KeyError(message)
 
-    return response.get('homeworks')
+def check_response(response: dict) -> list:
+    """Check response from API and return its homeworks."""
+    try:
+        return StatusResponse.from_json(response).homeworks
+    except (TypeError, KeyError) as error:
+        logging.error('Invalid API response: %s', error)
+        raise
 
 
-def parse_status(homework):
+def parse_status(homework) -> str:
     """Handle data from homework and return message with status."""
-    homework_name = homework.get("homework_name")
-    homework_status = homework.get("status")
+    if not isinstance(homework, Homework):
+        homework = Homework.from_dict(homework)
 
     try:
-        verdict = HOMEWORK_VERDICTS[homework_status]
+        verdict = HOMEWORK_VERDICTS[homework.status]
     except Exception as error:
-        message = f'''Homework status in response
-        from API does not exist {error}'''
-        logging.error(message)
-        raise KeyError(message)
+        UNKNOWN_STATUSES.inc(status=homework.status)
+        message = 'Homework status in response from API does not exist %s'
+        logging.error(
+            message, error, extra={'homework': homework.homework_name}
+        )
+        raise KeyError(message % error)
     else:
-        return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+        return (
+            f'Изменился статус проверки работы "{homework.homework_name}". '
+            f'{verdict}'
+        )
 
 
 def check_tokens():
@@ -113,11 +310,16 @@ def check_tokens():
     return all([PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID])
 
 
-def main():
-    """Main function."""
-    storage_messages = {}
-    storage_errors = {}
+def load_tenants() -> list:
+    """Return tenants from roster file or from environment variables."""
+    from tenants import Tenant, load_roster
 
+    if TENANTS_FILE:
+        if not TELEGRAM_TOKEN:
+            message = 'Missing required environment variable TOKEN_TG.'
+            logging.critical(message)
+            sys.exit(message)
+        return load_roster(TENANTS_FILE)
     if not check_tokens():
         message = '''
         Missing required environment variables.
@@ -125,40 +327,318 @@ def main():
          in the file ".env.example".'''
         logging.critical(message)
         sys.exit(message)
+    # TG_ID may list several chats separated by commas.
+    return [Tenant(PRACTICUM_TOKEN, str(TELEGRAM_CHAT_ID).split(','))]
 
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time())
 
-    while True:
-        try:
-            response = get_api_answer(current_timestamp)
-            homeworks = check_response(response)
-            if len(homeworks) == 0:
-                logging.debug('No homeworks to check.')
-                continue
-            for homework in homeworks:
-                message = parse_status(homework)
-                if storage_messages.get(homework['homework_name']) != message:
-                    send_message(bot, message)
-                    storage_messages[homework['homework_name']] = message
-            current_timestamp = response.get('current_date')
-        except Exception as error:
-            message = f'Program error: {error}'
-            for save_error in storage_errors:
-                if storage_errors[save_error] != message:
-                    logging.error(message)
-                    send_message(bot, message)
-                    storage_errors[str(error)] = message
-        finally:
-            time.sleep(RETRY_TIME)
+def select_tenants(tenants: list, process: int = None) -> list:
+    """Return tenants of this node and of its shard `process` if given."""
+    from sharding import node_tenants, process_tenants
 
+    if SHARD_NODES:
+        tenants = node_tenants(tenants, SHARD_NODES.split(','), SHARD_ID)
+    if process is not None:
+        tenants = process_tenants(tenants, SHARD_PROCESSES, process)
+    return tenants
 
-if __name__ == '__main__':
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='''
-        %(asctime)s - %(name)s - %(levelname)s -%(lineno)d - %(message)s
-        ''',
-        stream=sys.stdout,
+
+def make_bot(recorder=None):
+    """Return Telegram bot, recording its messages if recorder is given."""
+    import telegram
+    from telegram.utils.request import Request
+
+    from outbox import WORKERS
+
+    bot = telegram.Bot(
+        token=TELEGRAM_TOKEN, request=Request(con_pool_size=WORKERS)
+    )
+    if recorder is not None:
+        from traffic import RecordingBot
+
+        bot = RecordingBot(bot, recorder)
+    return bot
+
+
+def configure(scheduler, outbox, errors, watchdog,
+              share: float = 1) -> None:
+    """Apply intervals, rate limits and timeouts to parts of the bot."""
+    from scheduler import MAX_INTERVAL
+
+    if WEBHOOK_PORT:
+        # Pushes bring changes, polls only reconcile missed ones.
+        scheduler.min_interval = RECONCILE_INTERVAL
+        scheduler.reviewing_interval = RECONCILE_INTERVAL
+        scheduler.base_interval = RECONCILE_INTERVAL
+        scheduler.max_interval = max(MAX_INTERVAL, RECONCILE_INTERVAL)
+    else:
+        scheduler.base_interval = POLL_INTERVAL
+        scheduler.max_interval = max(MAX_INTERVAL, POLL_INTERVAL)
+    scheduler.budget.set_rate(REQUEST_BUDGET * share)
+    outbox.bucket.set_rate(TELEGRAM_RATE * share)
+    outbox.window = DIGEST_WINDOW
+    outbox.digest_size = DIGEST_SIZE
+    errors.window = ERROR_WINDOW
+    watchdog.stall_timeout = STALL_TIMEOUT
+    watchdog.max_lag = MAX_POLL_LAG
+
+
+def reload_config(poller, outbox, share: float = 1, process: int = None,
+                  recorder=None) -> bool:
+    """Read configuration and roster again and apply them to running bot.
+
+    New settings replace old ones only when roster loads with them.
+    Called in poll loop, so polls in flight are not disturbed.
+    """
+    previous = {name: globals()[name] for name, _, _ in SETTINGS}
+    try:
+        config = read_config()
+        restart = [
+            name for name in RESTART_SETTINGS
+            if config[name] != previous[name]
+        ]
+        # Running bot keeps settings which need restart, e.g. shard slice.
+        config.update((name, previous[name]) for name in RESTART_SETTINGS)
+        globals().update(config)
+        tenants = select_tenants(load_tenants(), process)
+    except (Exception, SystemExit) as error:
+        globals().update(previous)
+        logging.error('Configuration is not reloaded: %s', error)
+        return False
+    if restart:
+        logging.warning(
+            'Changes of %s apply after restart', ', '.join(restart)
+        )
+    if TELEGRAM_TOKEN != previous['TELEGRAM_TOKEN']:
+        outbox.bot = make_bot(recorder)
+        if POLL_MODE == 'async':
+            poller.telegram_token = TELEGRAM_TOKEN
+        else:
+            poller.bot = outbox.bot
+    configure(
+        poller.scheduler, outbox, poller.errors, poller.watchdog, share
+    )
+    poller.update_tenants(tenants)
+    logging.info('Configuration is reloaded')
+    return True
+
+
+def watched_files() -> list:
+    """Return files whose change reloads configuration."""
+    return [env_file(), TENANTS_FILE]
+
+
+def make_poller(bot, tenants: list, recorder=None, port_offset: int = 0,
+                **parts):
+    """Return poller of POLL_MODE with store, outbox and other `parts`."""
+    # Pollers import this module, so they are imported here, not at the top.
+    if POLL_MODE == 'async':
+        from async_poller import AsyncPoller
+
+        return AsyncPoller(
+            TELEGRAM_TOKEN, tenants, concurrency=CONCURRENCY,
+            timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), **parts
+        )
+
+    from poller import Poller
+    from response_cache import ResponseCache
+
+    client = PracticumClient(POOL_SIZE, CONNECT_TIMEOUT, READ_TIMEOUT)
+    if recorder is not None:
+        from traffic import RecordingClient
+
+        client = RecordingClient(client, recorder)
+    poller = Poller(
+        bot, tenants, stream=STREAM_RESPONSES, cache=ResponseCache(),
+        client=client, **parts
+    )
+    if WEBHOOK_PORT:
+        from webhook import start_webhook_server
+
+        start_webhook_server(
+            poller, int(WEBHOOK_PORT) + port_offset, WEBHOOK_HOST,
+            WEBHOOK_SECRET,
+        )
+    return poller
+
+
+def run_tenants(tenants: list, share: float = 1,
+                process: int = None) -> None:
+    """Poll tenants in this process.
+
+    `share` is part of Telegram and Practicum rate limits given to process,
+    number of shard `process` is added to admin and webhook ports.
+    """
+    from admin_server import start_admin_server
+    from error_report import ErrorAggregator
+    from file_watch import FileWatcher
+    from health import Watchdog
+    from metrics import OUTBOX_DEPTH
+    from outbox import Outbox
+    from profiler import SamplingProfiler
+    from scheduler import PollScheduler
+    from state import SQLiteStateStore
+
+    port_offset = process or 0
+    if process is None:
+        store = SQLiteStateStore(STATE_DB)
+    else:
+        store = SQLiteStateStore(
+            STATE_DB, shard=process, shards=SHARD_PROCESSES
+        )
+    recorder = None
+    if RECORD_TRAFFIC:
+        from traffic import TrafficRecorder
+
+        recorder = TrafficRecorder(RECORD_TRAFFIC)
+    bot = make_bot(recorder)
+    watchdog = Watchdog(STALL_TIMEOUT, MAX_POLL_LAG, restart_stalled)
+    watchdog.register()
+    watchdog.start()
+    outbox = Outbox(bot, store, watchdog=watchdog)
+    scheduler = PollScheduler()
+    errors = ErrorAggregator()
+    configure(scheduler, outbox, errors, watchdog, share)
+    profiler = SamplingProfiler(output_dir=PROFILE_DIR)
+    profiler.register()
+    if ADMIN_PORT:
+        start_admin_server(int(ADMIN_PORT) + port_offset)
+
+    poller = make_poller(
+        bot, tenants, recorder, port_offset, store=store, outbox=outbox,
+        scheduler=scheduler, errors=errors, watchdog=watchdog,
+    )
+    outbox.start()
+    OUTBOX_DEPTH.set_function(outbox.__len__)
+
+    def apply_reload() -> None:
+        if reload_config(poller, outbox, share, process, recorder):
+            watcher.watch(watched_files())
+
+    def reload(changed: list = None) -> None:
+        poller.submit(apply_reload)
+
+    watcher = FileWatcher(watched_files(), reload, RELOAD_INTERVAL)
+    if RELOAD_INTERVAL > 0:
+        watcher.start()
+    handle_signals(
+        poller.stop, lambda: profiler.start(PROFILE_SECONDS), reload
+    )
+    try:
+        if POLL_MODE == 'async':
+            import asyncio
+
+            asyncio.run(poller.run_forever())
+        else:
+            poller.run_forever()
+    finally:
+        watcher.stop()
+        watchdog.stop()
+        shutdown(outbox, store)
+
+
+def restart_stalled(stalled: list) -> None:
+    """Exit wedged process, so supervisor or orchestrator starts it again.
+
+    Stuck thread can not be interrupted, so state which it has not saved
+    yet is lost; pending messages stay in store.
+    """
+    logging.critical('Restarting stalled worker')
+    logging.shutdown()
+    os._exit(EXIT_STALLED)
+
+
+def handle_signals(stop, profile=None, reload=None) -> None:
+    """Call `stop` on SIGTERM and SIGINT instead of dying mid-send.
+
+    `profile` is called on SIGUSR1 and `reload` on SIGHUP where platform
+    has them.
+    """
+    def handler(signum, frame):
+        logging.info('Received signal %s, shutting down', signum)
+        stop()
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, handler)
+    if profile is not None and hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: profile())
+    if reload is not None and hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, lambda signum, frame: reload())
+
+
+def shutdown(outbox, store) -> None:
+    """Deliver queued messages within SHUTDOWN_TIMEOUT and save state."""
+    if not outbox.drain(SHUTDOWN_TIMEOUT):
+        logging.warning(
+            '%s messages stay in outbox until restart', len(outbox)
+        )
+    outbox.stop()
+    store.close()
+    logging.info('Bot stopped')
+
+
+def run_shard(number: int, share: float) -> None:
+    """Entry point of shard process started by main()."""
+    from log_config import setup_logging
+    from sharding import shard_names
+
+    load_config()
+    setup_logging(LOG_FORMAT)
+    # Roster may have changed since supervisor started, e.g. on restart.
+    tenants = select_tenants(load_tenants(), number)
+    logging.info(
+        '%s serves %s tenants', shard_names(SHARD_PROCESSES)[number],
+        len(tenants),
     )
-    main()
+    run_tenants(tenants, share, number)
+
+
+def check_poll_mode() -> None:
+    """Exit if settings need sync poller but POLL_MODE is async."""
+    if POLL_MODE != 'async':
+        return
+    # Async poller has no webhook receiver and does not record requests.
+    for name in ('WEBHOOK_PORT', 'RECORD_TRAFFIC'):
+        if globals()[name]:
+            message = f'{name} is supported only with POLL_MODE=sync.'
+            logging.critical(message)
+            sys.exit(message)
+
+
+def check_webhook() -> None:
+    """Exit if webhook receiver is reachable from network without secret."""
+    from webhook import is_loopback
+
+    if WEBHOOK_PORT and not WEBHOOK_SECRET and not is_loopback(WEBHOOK_HOST):
+        message = (
+            'WEBHOOK_SECRET is required when WEBHOOK_HOST is not loopback.'
+        )
+        logging.critical(message)
+        sys.exit(message)
+
+
+def main():
+    """Main function."""
+    from log_config import setup_logging
+    from sharding import run_processes
+
+    load_config()
+    setup_logging(LOG_FORMAT)
+    check_poll_mode()
+    check_webhook()
+    # Roster is checked before shard processes, which load it themselves.
+    tenants = select_tenants(load_tenants())
+    share = 1
+    if SHARD_NODES:
+        share /= len(SHARD_NODES.split(','))
+    if SHARD_PROCESSES > 1:
+        run_processes(SHARD_PROCESSES, run_shard, share / SHARD_PROCESSES)
+        return
+    run_tenants(tenants, share)
+
+
+if __name__ == '__main__':
+    # Pollers import `homework`, so the bot runs in that module and not in
+    # `__main__`, otherwise they would see a second copy of its globals.
+    from homework import main as run
+
+    run()
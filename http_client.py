@@ -0,0 +1,39 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+POOL_SIZE = 10
+# Most requests of async poller in flight at once.
+CONCURRENCY = 100
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+
+
+class PracticumClient:
+    """Keep-alive HTTP session with connection pool for Practicum API."""
+
+    def __init__(self, pool_size: int = POOL_SIZE,
+                 connect_timeout: float = CONNECT_TIMEOUT,
+                 read_timeout: float = READ_TIMEOUT) -> None:
+        """Open session with connection pool and timeouts."""
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, pool_block=True
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, url: str, headers: dict = None, params: dict = None,
+            **kwargs) -> 'requests.Response':
+        """Send GET request over pooled connection."""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, headers=headers, params=params, **kwargs)
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
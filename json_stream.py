@@ -0,0 +1,150 @@
+import codecs
+import json
+
+WHITESPACE = ' \t\n\r'
+
+
+class ArrayStream:
+    """Incremental decoder of JSON object with one large array member.
+
+    Body is fed in chunks as it arrives; items of array `key` are returned
+    as soon as they are complete, so only the item being received is kept
+    in memory. Other members of the object are collected into `fields`.
+    """
+
+    def __init__(self, key: str) -> None:
+        """Prepare parser looking for array under key."""
+        self.key = key
+        self.fields = {}
+        self.found = False
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._state = 'object'
+        self._name = None
+        self._closed = False
+
+    def feed(self, chunk: bytes) -> list:
+        """Decode next chunk of body and return items completed by it."""
+        self._buffer += self._text.decode(chunk, final=self._closed)
+        items = []
+        position = 0
+        while True:
+            position = self._skip_whitespace(position)
+            if position == len(self._buffer):
+                break
+            end = getattr(self, f'_read_{self._state}')(position, items)
+            if end is None:
+                break
+            position = end
+        self._buffer = self._buffer[position:]
+        return items
+
+    def close(self) -> list:
+        """Decode rest of body and check that object is complete."""
+        self._closed = True
+        items = self.feed(b'')
+        if self._state != 'done':
+            raise json.JSONDecodeError(
+                'Unexpected end of data', self._buffer, len(self._buffer)
+            )
+        return items
+
+    def _skip_whitespace(self, position: int) -> int:
+        buffer = self._buffer
+        while position < len(buffer) and buffer[position] in WHITESPACE:
+            position += 1
+        return position
+
+    def _decode(self, position: int):
+        """Return (value, end) or None if value is not received yet.
+
+        Value which ends at the end of buffer may be a number cut in the
+        middle, so it is decoded only when something follows it.
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, position)
+        except json.JSONDecodeError:
+            if self._closed:
+                raise
+            return None
+        if end == len(self._buffer) and not self._closed:
+            return None
+        return value, end
+
+    def _expect(self, position: int, char: str) -> None:
+        if self._buffer[position] != char:
+            raise json.JSONDecodeError(
+                f'Expecting {char!r}', self._buffer, position
+            )
+
+    def _read_object(self, position: int, items: list) -> int:
+        if self._buffer[position] != '{':
+            raise TypeError('Expected type data - dict')
+        self._state = 'member'
+        return position + 1
+
+    def _read_member(self, position: int, items: list):
+        if self._buffer[position] == '}':
+            self._state = 'done'
+            return position + 1
+        decoded = self._decode(position)
+        if decoded is None:
+            return None
+        self._name, position = decoded
+        if not isinstance(self._name, str):
+            raise json.JSONDecodeError(
+                'Expecting property name', self._buffer, position
+            )
+        self._state = 'colon'
+        return position
+
+    def _read_colon(self, position: int, items: list) -> int:
+        self._expect(position, ':')
+        self._state = 'value'
+        return position + 1
+
+    def _read_value(self, position: int, items: list):
+        if self._name == self.key:
+            if self._buffer[position] != '[':
+                raise TypeError('Expected type data - list')
+            self.found = True
+            self._state = 'item'
+            return position + 1
+        decoded = self._decode(position)
+        if decoded is None:
+            return None
+        self.fields[self._name], position = decoded
+        self._state = 'after_value'
+        return position
+
+    def _read_after_value(self, position: int, items: list) -> int:
+        if self._buffer[position] == '}':
+            self._state = 'done'
+            return position + 1
+        self._expect(position, ',')
+        self._state = 'member'
+        return position + 1
+
+    def _read_item(self, position: int, items: list):
+        if self._buffer[position] == ']':
+            self._state = 'after_value'
+            return position + 1
+        decoded = self._decode(position)
+        if decoded is None:
+            return None
+        item, position = decoded
+        items.append(item)
+        self._state = 'after_item'
+        return position
+
+    def _read_after_item(self, position: int, items: list) -> int:
+        if self._buffer[position] == ']':
+            self._state = 'after_value'
+            return position + 1
+        self._expect(position, ',')
+        self._state = 'item'
+        return position + 1
+
+    def _read_done(self, position: int, items: list) -> int:
+        raise json.JSONDecodeError('Extra data', self._buffer, position)
@@ -0,0 +1,132 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+TEXT_FORMAT = '''
+        %(asctime)s - %(name)s - %(levelname)s -%(lineno)d - %(message)s
+        '''
+RATE_LIMIT_WINDOW = 60
+RATE_LIMIT_BURST = 5
+QUEUE_SIZE = 10000
+EXTRA_FIELDS = ('tenant', 'homework', 'latency')
+
+
+class RateLimitFilter(logging.Filter):
+    """Pass at most `burst` records of one template per `window` seconds.
+
+    Records are compared by unformatted template, tenant and types of
+    errors among arguments, so suppressed records are never formatted and
+    one tenant's outage does not hide other errors. Number of suppressed
+    records is attached to the next record of the key which passes.
+    """
+
+    def __init__(self, window: float = RATE_LIMIT_WINDOW,
+                 burst: int = RATE_LIMIT_BURST,
+                 level: int = logging.WARNING) -> None:
+        """Prepare filter with window and burst of records."""
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.level = level
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Tell whether record may be emitted."""
+        if record.levelno < self.level:
+            return True
+        args = record.args if isinstance(record.args, tuple) else ()
+        key = (
+            record.levelno, record.pathname, record.lineno, record.msg,
+            getattr(record, 'tenant', None),
+            tuple(
+                type(arg).__name__ for arg in args
+                if isinstance(arg, BaseException)
+            ),
+        )
+        now = time.monotonic()
+        with self._lock:
+            started, count, suppressed = self._seen.get(key, (now, 0, 0))
+            if now - started >= self.window:
+                started, count = now, 0
+            if count >= self.burst:
+                self._seen[key] = (started, count, suppressed + 1)
+                return False
+            self._seen[key] = (started, count + 1, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Format record as one line of JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Return JSON with message, level, source and extra fields."""
+        data = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'line': record.lineno,
+            'message': record.getMessage(),
+        }
+        for field in EXTRA_FIELDS + ('suppressed',):
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class LazyQueueHandler(QueueHandler):
+    """Queue handler which leaves formatting to writer thread.
+
+    When writer falls behind and queue is full, records are dropped instead
+    of blocking the poll loop.
+    """
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Put record in queue or drop it if queue is full."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Put record in queue as is, without formatting message."""
+        return record
+
+
+def setup_logging(log_format: str = 'text', level: int = logging.DEBUG,
+                  stream=sys.stdout):
+    """Configure root logger; `json` mode writes from background thread.
+
+    Return listener of the queue in `json` mode and None otherwise.
+    """
+    rate_limit = RateLimitFilter()
+    if log_format != 'json':
+        logging.basicConfig(level=level, format=TEXT_FORMAT, stream=stream)
+        for handler in logging.getLogger().handlers:
+            handler.addFilter(rate_limit)
+        return None
+
+    records = queue.Queue(QUEUE_SIZE)
+    writer = logging.StreamHandler(stream)
+    writer.setFormatter(JSONFormatter())
+    listener = QueueListener(records, writer, respect_handler_level=True)
+    handler = LazyQueueHandler(records)
+    handler.addFilter(rate_limit)
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.handlers = [handler]
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
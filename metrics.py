@@ -0,0 +1,277 @@
+import bisect
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from http import HTTPStatus
+
+from admin_server import route
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30,
+)
+LAG_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 600)
+
+
+class Metric(ABC):
+    """Base of metrics which every thread records in its own shard.
+
+    Recording touches only dict of current thread, so it takes no locks;
+    shards are merged only when metrics are collected. Shard of a finished
+    thread is merged into `_retired`, so short-lived threads, e.g. of
+    webhook requests, do not pile up shards.
+    """
+
+    kind = None
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple = (), registry=None) -> None:
+        """Register metric with its name and labels."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._shards = []
+        self._retired = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            weakref.finalize(threading.current_thread(), self._retire, shard)
+        return shard
+
+    def _retire(self, shard: dict) -> None:
+        with self._lock:
+            self._merge(self._retired, shard)
+            self._shards = [
+                other for other in self._shards if other is not shard
+            ]
+
+    def _merge(self, total: dict, shard: dict) -> None:
+        for key, value in shard.items():
+            total[key] = total.get(key, 0) + value
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _labels(self, key: tuple) -> str:
+        if not key:
+            return ''
+        pairs = ','.join(
+            f'{name}="{value}"' for name, value in zip(self.labelnames, key)
+        )
+        return '{' + pairs + '}'
+
+    def _snapshot(self) -> list:
+        retired = {}
+        with self._lock:
+            self._merge(retired, self._retired)
+            return [retired] + [dict(shard) for shard in self._shards]
+
+    @abstractmethod
+    def samples(self) -> list:
+        """Return (suffix, labels, value) of all series."""
+
+
+class Counter(Metric):
+    """Monotonically growing count of events."""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Add amount to counter of series with given labels."""
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Return current value of series with given labels."""
+        key = self._key(labels)
+        return sum(shard.get(key, 0) for shard in self._snapshot())
+
+    def samples(self) -> list:
+        """Return (suffix, labels, value) of all series."""
+        totals = {}
+        for shard in self._snapshot():
+            self._merge(totals, shard)
+        return [
+            ('', self._labels(key), value)
+            for key, value in sorted(totals.items())
+        ]
+
+
+class Gauge(Metric):
+    """Value which goes up and down, set directly or read from function."""
+
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Prepare gauge without values."""
+        super().__init__(*args, **kwargs)
+        self._values = {}
+        self._function = None
+
+    def set(self, value: float, **labels) -> None:
+        """Set value of series with given labels."""
+        self._values[self._key(labels)] = value
+
+    def set_function(self, function) -> None:
+        """Read value of gauge from function at collection time."""
+        self._function = function
+
+    def value(self, **labels) -> float:
+        """Return current value of series with given labels."""
+        if self._function is not None:
+            return self._function()
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> list:
+        """Return (suffix, labels, value) of all series."""
+        if self._function is not None:
+            return [('', '', self._function())]
+        return [
+            ('', self._labels(key), value)
+            for key, value in sorted(dict(self._values).items())
+        ]
+
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS,
+                 registry=None) -> None:
+        """Register histogram with bucket bounds."""
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        """Count value in bucket of series with given labels."""
+        shard = self._shard()
+        key = self._key(labels)
+        series = shard.get(key)
+        if series is None:
+            series = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def _merge(self, total: dict, shard: dict) -> None:
+        for key, series in shard.items():
+            merged = total.setdefault(key, [0] * len(series))
+            for index, value in enumerate(series):
+                merged[index] += value
+
+    def count(self, **labels) -> int:
+        """Return number of observations of series with given labels."""
+        key = self._key(labels)
+        return sum(
+            sum(shard[key][:-1]) for shard in self._snapshot() if key in shard
+        )
+
+    def samples(self) -> list:
+        """Return (suffix, labels, value) of all series."""
+        totals = {}
+        for shard in self._snapshot():
+            self._merge(totals, shard)
+        samples = []
+        for key, series in sorted(totals.items()):
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series):
+                cumulative += count
+                samples.append(
+                    ('_bucket', _with_le(labels, bound), cumulative)
+                )
+            samples.append(('_sum', labels, series[-1]))
+            samples.append(('_count', labels, cumulative))
+        return samples
+
+
+def _with_le(labels: str, bound) -> str:
+    le = f'le="{bound}"'
+    if not labels:
+        return '{' + le + '}'
+    return labels[:-1] + ',' + le + '}'
+
+
+class Registry:
+    """Collection of metrics rendered in Prometheus text format."""
+
+    def __init__(self) -> None:
+        """Prepare empty registry."""
+        self.metrics = {}
+
+    def register(self, metric: Metric) -> None:
+        """Add metric to registry."""
+        if metric.name in self.metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+        self.metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Return all metrics in Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for suffix, labels, value in metric.samples():
+                lines.append(f'{metric.name}{suffix}{labels} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+PRACTICUM_LATENCY = Histogram(
+    'practicum_request_seconds',
+    'Latency of requests to Practicum API by status code.',
+    ('status',),
+)
+PRACTICUM_CACHE = Counter(
+    'practicum_cache_total',
+    'Practicum responses which repeated the previous one (hit) or not.',
+    ('result',),
+)
+TELEGRAM_LATENCY = Histogram(
+    'telegram_send_seconds',
+    'Latency of sending messages to Telegram.',
+)
+TELEGRAM_FAILURES = Counter(
+    'telegram_send_failures_total',
+    'Failed attempts to send message to Telegram by reason.',
+    ('reason',),
+)
+OUTBOX_DEPTH = Gauge(
+    'outbox_depth',
+    'Messages waiting for delivery to Telegram.',
+)
+POLL_LAG = Histogram(
+    'poll_lag_seconds',
+    'Delay between scheduled and actual start of poll.',
+    buckets=LAG_BUCKETS,
+)
+UNKNOWN_STATUSES = Counter(
+    'parse_status_errors_total',
+    'Homeworks with status missing from HOMEWORK_VERDICTS.',
+    ('status',),
+)
+WEBHOOK_REQUESTS = Counter(
+    'webhook_requests_total',
+    'Pushed homework payloads by response status.',
+    ('status',),
+)
+POLL_ERRORS = Counter(
+    'poll_errors_total',
+    'Errors of polls by whether tenant was notified about them.',
+    ('result',),
+)
+
+
+@route('/metrics')
+def metrics_page(query: dict) -> tuple:
+    """Answer Prometheus scrape."""
+    return HTTPStatus.OK, 'text/plain; version=0.0.4', REGISTRY.render()
@@ -0,0 +1,149 @@
+import json
+import sys
+
+from json_stream import ArrayStream
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Homework:
+    """One homework from Practicum API response.
+
+    Status and name repeat in every response, so they are interned and all
+    polls of all tenants share one copy of each string.
+    """
+
+    __slots__ = (
+        'id', 'homework_name', 'status', 'reviewer_comment',
+        'date_updated', 'lesson_name',
+    )
+
+    def __init__(self, homework_id=None, homework_name: str = None,
+                 status: str = None, reviewer_comment: str = None,
+                 date_updated: str = None, lesson_name: str = None) -> None:
+        """Keep fields of homework from API answer."""
+        self.id = homework_id
+        self.homework_name = _intern(homework_name)
+        self.status = _intern(status)
+        self.reviewer_comment = reviewer_comment
+        self.date_updated = date_updated
+        self.lesson_name = _intern(lesson_name)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Homework':
+        """Build homework from item of `homeworks` list."""
+        if not isinstance(data, dict):
+            raise TypeError(
+                f'Expected type homework - dict, received - {type(data)}'
+            )
+        get = data.get
+        return cls(
+            get('id'), get('homework_name'), get('status'),
+            get('reviewer_comment'), get('date_updated'), get('lesson_name'),
+        )
+
+    @property
+    def key(self) -> str:
+        """Key of homework which does not change between polls."""
+        return str(self.homework_name if self.id is None else self.id)
+
+    def __repr__(self) -> str:
+        """Show id, name and status of homework."""
+        return (
+            f'Homework(id={self.id!r}, homework_name={self.homework_name!r}, '
+            f'status={self.status!r})'
+        )
+
+
+class StatusResponse:
+    """Response of Practicum API validated in one pass."""
+
+    __slots__ = ('homeworks', 'current_date')
+
+    def __init__(self, homeworks: list, current_date: int = None) -> None:
+        """Keep homeworks and date of API answer."""
+        self.homeworks = homeworks
+        self.current_date = current_date
+
+    def __iter__(self):
+        """Iterate over homeworks."""
+        return iter(self.homeworks)
+
+    def close(self) -> None:
+        """Do nothing, response is already read."""
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'StatusResponse':
+        """Validate decoded JSON and build response with its homeworks."""
+        if not isinstance(data, dict):
+            raise TypeError(
+                f'Expected type data - dict, received - {type(data)}'
+            )
+        if not data:
+            raise KeyError('Response contains empty dict')
+        homeworks = data.get('homeworks')
+        if not isinstance(homeworks, list):
+            raise TypeError(
+                f'Expected type data - list, received - {type(homeworks)}'
+            )
+        return cls(
+            [Homework.from_dict(item) for item in homeworks],
+            data.get('current_date'),
+        )
+
+
+class StatusStream:
+    """Response of Practicum API decoded while its body is received.
+
+    Iteration yields homeworks as soon as they arrive. When it is over,
+    `current_date` is filled and `homeworks` holds key and status of each
+    streamed homework, which is all the scheduler needs, so the rest of
+    a long response is not kept in memory.
+    """
+
+    __slots__ = ('statuses', 'current_date', '_chunks')
+
+    def __init__(self, chunks) -> None:
+        """Wrap chunks of response body."""
+        self.statuses = {}
+        self.current_date = None
+        self._chunks = chunks
+
+    @property
+    def homeworks(self) -> list:
+        """Streamed homeworks reduced to their keys and statuses."""
+        return [
+            Homework(key, status=status)
+            for key, status in self.statuses.items()
+        ]
+
+    def __iter__(self):
+        """Yield homeworks while body is being read."""
+        parser = ArrayStream('homeworks')
+        try:
+            for chunk in self._chunks:
+                yield from self._collect(parser.feed(chunk))
+            yield from self._collect(parser.close())
+        except json.JSONDecodeError as error:
+            raise KeyError(
+                f'Transfotmation error JSON in python data: {error}'
+            ) from error
+        if not parser.found:
+            if not parser.fields:
+                raise KeyError('Response contains empty dict')
+            raise TypeError('Expected type data - list, received - None')
+        self.current_date = parser.fields.get('current_date')
+
+    def close(self) -> None:
+        """Stop receiving body and release connection of response."""
+        close = getattr(self._chunks, 'close', None)
+        if close is not None:
+            close()
+
+    def _collect(self, items: list):
+        for item in items:
+            homework = Homework.from_dict(item)
+            self.statuses[homework.key] = homework.status
+            yield homework
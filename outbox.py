@@ -0,0 +1,277 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+
+from telegram.error import BadRequest, RetryAfter, Unauthorized
+
+from health import Watchdog
+from metrics import TELEGRAM_FAILURES, TELEGRAM_LATENCY
+from ratelimit import TokenBucket, backoff_delay
+
+GLOBAL_RATE = 30
+CHAT_RATE = 1
+MAX_ATTEMPTS = 5
+RETRY_BASE = 1
+RETRY_CAP = 60
+WORKERS = 4
+MESSAGE_LIMIT = 4096
+DIGEST_TITLE = 'Изменения статусов проверки работ ({count}):'
+DIGEST_SEPARATOR = '\n\n'
+
+
+class OutboxMessage:
+    """Message waiting for delivery to Telegram chat."""
+
+    __slots__ = ('id', 'chat_id', 'text', 'attempts')
+
+    def __init__(self, chat_id, text: str, message_id: str = None) -> None:
+        """Keep text for chat with unique id."""
+        self.id = message_id or uuid.uuid4().hex
+        self.chat_id = chat_id
+        self.text = text
+        self.attempts = 0
+
+
+def digest_text(batch: list) -> str:
+    """Return text of one Telegram message with all messages of batch."""
+    if len(batch) == 1:
+        return batch[0].text
+    return DIGEST_SEPARATOR.join(
+        [DIGEST_TITLE.format(count=len(batch))]
+        + [message.text for message in batch]
+    )
+
+
+class Outbox:
+    """Queue of outgoing Telegram messages with rate limits and retries.
+
+    Messages of one chat are delivered in order, one at a time, not faster
+    than `chat_rate` per second, and all chats together - not faster than
+    `rate` per second. Pending messages are kept in state store until they
+    are delivered or dropped.
+
+    With `digest_size` above 1 messages waiting for one chat are merged
+    into digests of up to `digest_size` messages and MESSAGE_LIMIT chars.
+    First message of a chat waits `window` seconds for others to join it,
+    unless `digest_size` messages are collected earlier.
+    """
+
+    def __init__(self, bot, store=None, rate: float = GLOBAL_RATE,
+                 chat_rate: float = CHAT_RATE,
+                 max_attempts: int = MAX_ATTEMPTS,
+                 workers: int = WORKERS, window: float = 0,
+                 digest_size: int = 1, watchdog=None,
+                 clock=time.monotonic) -> None:
+        """Prepare queues of chats and their rate limits."""
+        self.bot = bot
+        self.store = store
+        self.chat_rate = chat_rate
+        self.max_attempts = max_attempts
+        self.workers = workers
+        self.window = window
+        self.digest_size = digest_size
+        self.watchdog = Watchdog() if watchdog is None else watchdog
+        self.clock = clock
+        self.bucket = TokenBucket(rate, clock=clock)
+        self._chat_buckets = {}
+        self._queues = {}
+        self._ready = []
+        # Chat -> number of its valid entry in `_ready`; chats which are
+        # being delivered have no entry.
+        self._scheduled = {}
+        # Chats whose first message waits `window` for others.
+        self._held = set()
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._stopped = False
+        if store is not None:
+            for message_id, chat_id, text in store.load_pending():
+                self._push(OutboxMessage(chat_id, text, message_id))
+
+    def __len__(self) -> int:
+        """Return number of queued messages."""
+        with self._condition:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def _schedule(self, chat_id, delay: float = 0) -> None:
+        number = next(self._counter)
+        self._scheduled[chat_id] = number
+        heapq.heappush(self._ready, (self.clock() + delay, number, chat_id))
+        self._condition.notify()
+
+    def _push(self, message: OutboxMessage) -> None:
+        with self._condition:
+            queue = self._queues.get(message.chat_id)
+            if queue is None:
+                queue = self._queues[message.chat_id] = deque()
+                self._schedule(message.chat_id, self.window)
+                if self.window:
+                    self._held.add(message.chat_id)
+            queue.append(message)
+            if (self.window and len(queue) == self.digest_size
+                    and message.chat_id in self._scheduled):
+                self._schedule(message.chat_id)
+
+    def enqueue(self, chat_id, text: str) -> OutboxMessage:
+        """Put message in queue and return without waiting for Telegram."""
+        message = OutboxMessage(chat_id, text)
+        if self.store is not None:
+            self.store.add_pending(message.id, chat_id, text)
+        self._push(message)
+        return message
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, capacity=1, clock=self.clock)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _batch(self, chat_id) -> list:
+        """Return next messages of chat which fit in one digest."""
+        batch = []
+        length = len(DIGEST_TITLE) + len(str(self.digest_size))
+        for message in itertools.islice(
+            self._queues[chat_id], self.digest_size
+        ):
+            length += len(DIGEST_SEPARATOR) + len(message.text)
+            if batch and length > MESSAGE_LIMIT:
+                break
+            batch.append(message)
+        return batch
+
+    def _take(self, timeout: float):
+        """Wait for chat which may send now and return its next messages."""
+        deadline = self.clock() + timeout
+        with self._condition:
+            while not self._stopped:
+                now = self.clock()
+                if self._ready and self._ready[0][0] <= now:
+                    _, number, chat_id = heapq.heappop(self._ready)
+                    if self._scheduled.get(chat_id) != number:
+                        continue
+                    delay = self._chat_bucket(chat_id).delay()
+                    if delay > 0:
+                        self._schedule(chat_id, delay)
+                        continue
+                    self._chat_bucket(chat_id).consume()
+                    del self._scheduled[chat_id]
+                    self._held.discard(chat_id)
+                    return self._batch(chat_id)
+                if now >= deadline:
+                    return None
+                wait = deadline - now
+                if self._ready:
+                    wait = min(wait, self._ready[0][0] - now)
+                self._condition.wait(wait)
+        return None
+
+    def _finish(self, batch: list, delay: float = None) -> None:
+        """Reschedule chat after batch was delivered, dropped or delayed."""
+        chat_id = batch[0].chat_id
+        with self._condition:
+            queue = self._queues[chat_id]
+            if delay is None:
+                for message in batch:
+                    queue.popleft()
+                    if self.store is not None:
+                        self.store.remove_pending(message.id)
+            if queue:
+                self._schedule(chat_id, delay or 0)
+            else:
+                del self._queues[chat_id]
+                self._condition.notify_all()
+
+    def _deliver(self, batch: list) -> None:
+        while not self.bucket.consume():
+            time.sleep(self.bucket.delay())
+        message = batch[0]
+        started = time.monotonic()
+        try:
+            with self.watchdog.track('send', message.chat_id):
+                self.bot.send_message(message.chat_id, digest_text(batch))
+        except RetryAfter as error:
+            TELEGRAM_FAILURES.inc(reason='retry_after')
+            logging.warning(
+                'Telegram asks to retry after %s s', error.retry_after)
+            self._finish(batch, error.retry_after)
+        except (BadRequest, Unauthorized) as error:
+            TELEGRAM_FAILURES.inc(reason='rejected')
+            logging.error(
+                'Message to chat %s dropped: %s', message.chat_id, error)
+            self._finish(batch)
+        except Exception as error:
+            TELEGRAM_FAILURES.inc(reason='error')
+            message.attempts += 1
+            if message.attempts >= self.max_attempts:
+                logging.error(
+                    'Message to chat %s dropped after %s attempts: %s',
+                    message.chat_id, message.attempts, error)
+                self._finish(batch)
+                return
+            self._finish(
+                batch, backoff_delay(message.attempts, RETRY_BASE, RETRY_CAP)
+            )
+        else:
+            latency = time.monotonic() - started
+            TELEGRAM_LATENCY.observe(latency)
+            logging.info(
+                'The message successfully sent', extra={'latency': latency}
+            )
+            self._finish(batch)
+
+    def process(self, timeout: float = 0) -> bool:
+        """Deliver one message if some chat may send within `timeout`."""
+        batch = self._take(timeout)
+        if batch is None:
+            return False
+        self._deliver(batch)
+        return True
+
+    def _work(self) -> None:
+        while not self._stopped:
+            self.process(timeout=1)
+
+    def start(self) -> None:
+        """Start delivery threads."""
+        for number in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f'outbox-{number}', daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def drain(self, timeout: float) -> bool:
+        """Wait until queued messages are delivered or dropped.
+
+        Held digests are sent right away. Return False if messages are
+        still queued after `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self.window = 0
+            for chat_id in self._held:
+                self._schedule(chat_id)
+            self._held.clear()
+            while self._queues:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def stop(self) -> None:
+        """Stop delivery threads, pending messages stay in store."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.store is not None:
+            self.store.flush()
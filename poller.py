@@ -0,0 +1,326 @@
+import logging
+import queue
+import random
+import threading
+import time
+
+from breaker import CircuitBreaker
+from diff import diff
+from error_report import ErrorAggregator
+from exeption import CircuitOpenError
+from health import Watchdog
+
+from homework import (
+    RETRY_TIME,
+    check_response,
+    fetch_homework_statuses,
+    send_message_to_chat,
+    stream_homework_statuses,
+)
+from models import StatusResponse
+from response_cache import cache_key
+from scheduler import PollScheduler
+from tenants import subscribe_tenants
+
+
+def error_message(tenant, error: Exception, errors: ErrorAggregator):
+    """Return message about error or None while it is suppressed."""
+    message = errors.record(tenant.id, error)
+    if message is None:
+        logging.debug(
+            'Program error: %s', error, extra={'tenant': tenant.id}
+        )
+        return None
+    logging.error('Program error: %s', error, extra={'tenant': tenant.id})
+    return message
+
+
+def resolved_message(tenant, errors: ErrorAggregator):
+    """Return message about resolved errors of tenant or None."""
+    message = errors.resolve(tenant.id)
+    if message is not None:
+        logging.info(message, extra={'tenant': tenant.id})
+    return message
+
+
+def paused_delay(error: CircuitOpenError) -> float:
+    """Return delay which spreads polls resumed after circuit opening."""
+    return error.retry_after + random.uniform(0, error.retry_after)
+
+
+def restore_tenants(tenants: list, store=None) -> list:
+    """Load saved state of tenants and start new ones from current time."""
+    started = int(time.time())
+    for tenant in tenants:
+        if store is not None:
+            store.load(tenant)
+        if tenant.cursor is None:
+            tenant.cursor = started
+    return list(tenants)
+
+
+def schedule_restored(scheduler, tenants: list) -> None:
+    """Schedule tenants by saved due time, overdue ones first and now."""
+    now = time.time()
+    for tenant in tenants:
+        scheduler.add(tenant.id, 0 if tenant.due is None else tenant.due - now)
+
+
+def save_due(tenant, delay: float, store=None) -> None:
+    """Remember when tenant is polled next, so restart keeps the schedule."""
+    tenant.due = time.time() + delay
+    if store is not None:
+        store.save_due(tenant)
+
+
+def reconcile_tenants(current: dict, tenants: list, scheduler,
+                      store=None) -> list:
+    """Apply new roster to `current` tenants by id and return new list.
+
+    New tenants are restored and scheduled, missing ones are removed, and
+    the rest keep their state and schedule, only chats and token change.
+    """
+    tenants = subscribe_tenants(tenants)
+    ids = {tenant.id for tenant in tenants}
+    removed = [tenant_id for tenant_id in current if tenant_id not in ids]
+    for tenant_id in removed:
+        scheduler.remove(tenant_id)
+        del current[tenant_id]
+    added = []
+    for tenant in tenants:
+        kept = current.get(tenant.id)
+        if kept is None:
+            added.append(tenant)
+            continue
+        kept.chat_id, kept.chat_ids = tenant.chat_id, tenant.chat_ids
+        if kept.token != tenant.token:
+            kept.token, kept.headers = tenant.token, tenant.headers
+    restore_tenants(added, store)
+    schedule_restored(scheduler, added)
+    current.update((tenant.id, tenant) for tenant in added)
+    if added or removed:
+        logging.info(
+            'Roster changed: %s tenants added, %s removed',
+            len(added), len(removed),
+        )
+    return [current[tenant.id] for tenant in tenants]
+
+
+class Poller:
+    """Poll Practicum API for every tenant on one shared schedule."""
+
+    def __init__(self, bot, tenants: list, retry_time: int = RETRY_TIME,
+                 store=None, scheduler=None, outbox=None, breaker=None,
+                 stream: bool = False, cache=None, errors=None,
+                 watchdog=None, client=None):
+        """Prepare poller of tenants with its helpers."""
+        self.bot = bot
+        self.stream = stream
+        self.cache = cache
+        self.client = client
+        self.store = store
+        self.outbox = outbox
+        self.breaker = breaker or CircuitBreaker()
+        self.errors = ErrorAggregator() if errors is None else errors
+        self.watchdog = Watchdog() if watchdog is None else watchdog
+        self.tenants = restore_tenants(subscribe_tenants(tenants), store)
+        if scheduler is None:
+            scheduler = PollScheduler(base_interval=retry_time)
+        self.scheduler = scheduler
+        self._tenants = {tenant.id: tenant for tenant in self.tenants}
+        self._pushed = queue.SimpleQueue()
+        self._calls = queue.SimpleQueue()
+        self._stopping = threading.Event()
+        schedule_restored(self.scheduler, self.tenants)
+
+    def send(self, chat_id, message: str) -> None:
+        """Put message in outbox or send it right away if there is none."""
+        if self.outbox is not None:
+            self.outbox.enqueue(chat_id, message)
+        else:
+            send_message_to_chat(self.bot, chat_id, message)
+
+    def fetch(self, tenant):
+        """Request homeworks of tenant as StatusResponse or StatusStream.
+
+        Response which repeats the previous one becomes empty StatusResponse.
+        """
+        fetch = (
+            stream_homework_statuses if self.stream
+            else fetch_homework_statuses
+        )
+        with self.breaker:
+            data = fetch(
+                tenant.headers, tenant.cursor, self.cache, self.client
+            )
+        if data is None:
+            return StatusResponse([])
+        if self.stream:
+            return data
+        return StatusResponse(check_response(data), data.get('current_date'))
+
+    def notify(self, tenant, homeworks, changed: dict) -> None:
+        """Send changed statuses to subscribed chats, remember fingerprints.
+
+        Fingerprints of sent statuses are also put in `changed`.
+        """
+        for event in diff(tenant.snapshot, homeworks):
+            message = event.message()
+            for chat_id in tenant.chat_ids:
+                self.send(chat_id, message)
+            tenant.snapshot[event.key] = event.fingerprint
+            changed[event.key] = event.fingerprint
+
+    def poll_tenant(self, tenant) -> list:
+        """Check homeworks of one tenant and send changed statuses."""
+        key = cache_key(tenant.headers, tenant.cursor)
+        changed = {}
+        response = None
+        try:
+            response = self.fetch(tenant)
+            self.notify(tenant, response, changed)
+            # Cursor stays while nothing changes, so the same request is
+            # repeated and response cache can recognise it.
+            if response.homeworks and response.current_date is not None:
+                tenant.cursor = response.current_date
+        except Exception:
+            if self.cache is not None:
+                self.cache.discard(key)
+            raise
+        finally:
+            if response is not None:
+                # Stream which notify() left unread still holds connection.
+                response.close()
+            if self.store is not None:
+                self.store.save(tenant, changed)
+        homeworks = response.homeworks
+        if len(homeworks) == 0:
+            logging.debug(
+                'No homeworks to check.', extra={'tenant': tenant.id}
+            )
+        return homeworks
+
+    def handle_error(self, tenant, error: Exception) -> None:
+        """Report new error of tenant and summaries of repeated ones."""
+        self.report(tenant, error_message(tenant, error, self.errors))
+
+    def report(self, tenant, message: str) -> None:
+        """Send message about errors of tenant if there is one."""
+        if message is None:
+            return
+        try:
+            self.send(tenant.chat_id, message)
+        except KeyError:
+            pass
+
+    def poll_scheduled(self, tenant) -> None:
+        """Poll tenant and schedule its next poll by activity."""
+        try:
+            with self.watchdog.track('poll', tenant.id):
+                homeworks = self.poll_tenant(tenant)
+        except CircuitOpenError as error:
+            delay = self.scheduler.record_error(
+                tenant.id, paused_delay(error)
+            )
+        except Exception as error:
+            self.handle_error(tenant, error)
+            delay = self.scheduler.record_error(tenant.id)
+        else:
+            self.report(tenant, resolved_message(tenant, self.errors))
+            delay = self.scheduler.record(tenant.id, homeworks)
+        save_due(tenant, delay, self.store)
+        self.watchdog.heartbeat()
+
+    def run_cycle(self) -> None:
+        """Poll all tenants once."""
+        for tenant in self.tenants:
+            self.poll_scheduled(tenant)
+        if self.store is not None:
+            self.store.flush()
+
+    def run_due(self) -> None:
+        """Poll tenants whose scheduled time has come."""
+        for tenant_id in self.scheduler.pop_due():
+            if self._stopping.is_set():
+                self.scheduler.add(tenant_id)
+                continue
+            self.poll_scheduled(self._tenants[tenant_id])
+        if self.store is not None:
+            self.store.flush()
+
+    def push(self, tenant_id: str, homeworks: list) -> None:
+        """Queue pushed homeworks of tenant; safe to call from any thread."""
+        if tenant_id not in self._tenants:
+            raise KeyError(f'Unknown tenant {tenant_id}')
+        self._pushed.put((tenant_id, homeworks))
+
+    def ingest(self, tenant, homeworks: list) -> None:
+        """Send changed statuses of pushed homeworks.
+
+        Pushed payload may be partial, so cursor is left to polls.
+        """
+        changed = {}
+        try:
+            self.notify(tenant, homeworks, changed)
+        finally:
+            if self.store is not None:
+                self.store.save(tenant, changed)
+
+    def run_pushed(self, timeout: float = 0) -> None:
+        """Handle pushed homeworks, waiting up to `timeout` for first ones."""
+        try:
+            item = self._pushed.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while True:
+            # None only wakes up the loop, see stop() and submit(). Tenant
+            # may be removed from roster after its homeworks were pushed.
+            tenant = None if item is None else self._tenants.get(item[0])
+            if tenant is not None:
+                try:
+                    self.ingest(tenant, item[1])
+                except Exception as error:
+                    self.handle_error(tenant, error)
+            try:
+                item = self._pushed.get_nowait()
+            except queue.Empty:
+                break
+        if self.store is not None:
+            self.store.flush()
+
+    def submit(self, function) -> None:
+        """Call function in poll loop between polls; safe from any thread."""
+        self._calls.put(function)
+        self._pushed.put(None)
+
+    def run_calls(self) -> None:
+        """Call functions passed to submit()."""
+        while True:
+            try:
+                function = self._calls.get_nowait()
+            except queue.Empty:
+                return
+            function()
+
+    def update_tenants(self, tenants: list) -> None:
+        """Replace roster without touching unchanged tenants."""
+        self.tenants = reconcile_tenants(
+            self._tenants, tenants, self.scheduler, self.store
+        )
+
+    def run_forever(self) -> None:
+        """Poll tenants as scheduler decides and handle pushed homeworks.
+
+        Return after stop() once the poll in progress is finished.
+        """
+        while not self._stopping.is_set():
+            self.run_calls()
+            self.run_due()
+            sleep_time = self.scheduler.sleep_time()
+            self.watchdog.heartbeat(sleep_time, self.scheduler.lag())
+            self.run_pushed(sleep_time)
+
+    def stop(self) -> None:
+        """Stop polling; safe to call from signal handler or other thread."""
+        self._stopping.set()
+        self._pushed.put(None)
@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from http import HTTPStatus
+
+from admin_server import route
+
+INTERVAL = 0.005
+SECONDS = 30
+MAX_SECONDS = 300
+PROFILE_DIR = 'profiles'
+
+# Phase -> functions whose frames on stack mean time spent in phase.
+PHASES = {
+    'get_api_answer': (
+        'get_api_answer', 'fetch_homework_statuses',
+        'stream_homework_statuses', 'request_homework_statuses',
+    ),
+    'check_response': ('check_response', 'from_json'),
+    'parse_status': ('parse_status',),
+    'send_message': ('send_message', 'send_message_to_chat', '_deliver'),
+}
+
+
+def frame_name(frame) -> str:
+    """Return `file:function` of frame."""
+    code = frame.f_code
+    return (
+        f'{os.path.basename(code.co_filename)}:'
+        f'{getattr(code, "co_qualname", code.co_name)}'
+    )
+
+
+def collapse(frame, thread: str) -> str:
+    """Return stack of frame in collapsed form, outermost call first."""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    names.append(thread)
+    return ';'.join(reversed(names))
+
+
+def phase_samples(stacks: Counter) -> dict:
+    """Return number of samples which fell into each phase."""
+    phases = dict.fromkeys(PHASES, 0)
+    for stack, count in stacks.items():
+        functions = {
+            name.rpartition(':')[2].rpartition('.')[2]
+            for name in stack.split(';')
+        }
+        for phase, names in PHASES.items():
+            if functions.intersection(names):
+                phases[phase] += count
+    return phases
+
+
+class SamplingProfiler:
+    """Sample stacks of all threads for a while on demand.
+
+    Stacks are written to `output_dir` in collapsed form, which
+    flamegraph.pl and speedscope read, with a JSON summary of wall time
+    spent in every phase of PHASES. Nothing is sampled between sessions,
+    so polls and sends pay nothing while profiler is off. Waiting
+    coroutines of async poller are not on any stack and are not seen.
+    """
+
+    def __init__(self, interval: float = INTERVAL,
+                 output_dir: str = PROFILE_DIR) -> None:
+        """Prepare stopped profiler."""
+        self.interval = interval
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+
+    def _sample(self, seconds: float) -> tuple:
+        own = threading.get_ident()
+        threads = {}
+        stacks = Counter()
+        ticks = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident not in threads:
+                    threads = {
+                        thread.ident: thread.name
+                        for thread in threading.enumerate()
+                    }
+                stacks[collapse(frame, threads.get(ident, str(ident)))] += 1
+            ticks += 1
+            time.sleep(self.interval)
+        return stacks, ticks, time.perf_counter() - started
+
+    def profile(self, seconds: float = SECONDS):
+        """Sample stacks for `seconds`, write them and return summary.
+
+        Return None if another session is running.
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            stacks, ticks, elapsed = self._sample(seconds)
+        finally:
+            self._lock.release()
+        tick = elapsed / ticks if ticks else 0
+        summary = {
+            'seconds': round(elapsed, 3),
+            'samples': ticks,
+            'interval': round(tick, 6),
+            'phases': {
+                phase: {'samples': count, 'seconds': round(count * tick, 3)}
+                for phase, count in phase_samples(stacks).items()
+            },
+        }
+        summary.update(self.write(stacks, summary))
+        logging.info('Profile is written to %s', summary['folded'])
+        return summary
+
+    def write(self, stacks: Counter, summary: dict) -> dict:
+        """Write collapsed stacks and summary, return their paths."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(
+            self.output_dir,
+            f'profile-{os.getpid()}-{time.strftime("%Y%m%d-%H%M%S")}',
+        )
+        paths = {'folded': base + '.folded', 'summary': base + '.json'}
+        with open(paths['folded'], 'w', encoding='utf-8') as folded:
+            for stack, count in stacks.most_common():
+                folded.write(f'{stack} {count}\n')
+        with open(paths['summary'], 'w', encoding='utf-8') as file:
+            json.dump({**summary, **paths}, file, indent=2)
+        return paths
+
+    def start(self, seconds: float = SECONDS) -> None:
+        """Profile in background thread; safe to call from signal handler."""
+        threading.Thread(
+            target=self.profile, args=(seconds,), name='profiler',
+            daemon=True,
+        ).start()
+
+    def register(self) -> None:
+        """Answer /profile?seconds=N of admin server."""
+        route('/profile')(self.profile_page)
+
+    def profile_page(self, query: dict) -> tuple:
+        """Profile for requested seconds and answer with summary."""
+        try:
+            seconds = float(query.get('seconds', [SECONDS])[0])
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, 'text/plain', 'Wrong seconds\n'
+        summary = self.profile(min(max(seconds, 0), MAX_SECONDS))
+        if summary is None:
+            return (
+                HTTPStatus.CONFLICT, 'text/plain',
+                'Profiler is already running\n',
+            )
+        return (
+            HTTPStatus.OK, 'application/json',
+            json.dumps(summary, indent=2) + '\n',
+        )
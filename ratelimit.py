@@ -0,0 +1,53 @@
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """Token bucket which allows `rate` events per second on average."""
+
+    def __init__(self, rate: float, capacity: float = None,
+                 clock=time.monotonic) -> None:
+        """Start full bucket refilled with rate per second."""
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def set_rate(self, rate: float) -> None:
+        """Change rate, and capacity if it follows rate, keeping tokens."""
+        with self._lock:
+            self._refill()
+            if self.capacity == max(self.rate, 1):
+                self.capacity = max(rate, 1)
+                self.tokens = min(self.tokens, self.capacity)
+            self.rate = rate
+
+    def consume(self, tokens: float = 1) -> bool:
+        """Take tokens if there are enough of them."""
+        with self._lock:
+            self._refill()
+            if self.tokens < tokens:
+                return False
+            self.tokens -= tokens
+            return True
+
+    def delay(self, tokens: float = 1) -> float:
+        """Return seconds left until bucket has enough tokens."""
+        with self._lock:
+            self._refill()
+            return max(0.0, (tokens - self.tokens) / self.rate)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Return full-jitter exponential backoff delay for retry `attempt`."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -0,0 +1,100 @@
+import hashlib
+import re
+from collections import OrderedDict
+from http import HTTPStatus
+
+from metrics import PRACTICUM_CACHE
+
+MAX_ENTRIES = 10000
+
+# `current_date` changes in every response, so it is left out of the hash.
+CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*-?\d+')
+
+
+def cache_key(headers: dict, from_date: int) -> tuple:
+    """Return key of request with given headers and `from_date`."""
+    return headers.get('Authorization'), from_date
+
+
+def body_digest(body: bytes) -> bytes:
+    """Return hash of response body without its `current_date`."""
+    return hashlib.blake2b(
+        CURRENT_DATE.sub(b'', body), digest_size=16
+    ).digest()
+
+
+class CacheEntry:
+    """Validators and body hash of last response to one request."""
+
+    __slots__ = ('etag', 'last_modified', 'digest')
+
+    def __init__(self, etag: str = None, last_modified: str = None,
+                 digest: bytes = None) -> None:
+        """Keep validators and digest of response."""
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+
+
+class ResponseCache:
+    """LRU of Practicum responses keyed by (token, from_date).
+
+    Requests carry `If-None-Match`/`If-Modified-Since` when server sent
+    validators before. Servers without validators answer with full body,
+    which is then compared with hash of the previous one, so unchanged
+    payload is recognised before it is decoded.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES) -> None:
+        """Prepare empty cache of limited size."""
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return number of cached responses."""
+        return len(self._entries)
+
+    def discard(self, key: tuple) -> None:
+        """Forget response which was not processed to the end."""
+        self._entries.pop(key, None)
+
+    def conditional_headers(self, key: tuple) -> dict:
+        """Return validators to send with request for key."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def unchanged(self, key: tuple, response, read_body: bool = True) -> bool:
+        """Remember response and tell whether it repeats the previous one.
+
+        Body of response with status 200 is read to hash it unless
+        `read_body` is false, e.g. when it is going to be streamed.
+        """
+        previous = self._entries.get(key)
+        if response.status_code == HTTPStatus.NOT_MODIFIED:
+            hit = previous is not None
+            entry = previous
+        else:
+            entry = CacheEntry(
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified'),
+                body_digest(response.content) if read_body else None,
+            )
+            hit = (
+                entry.digest is not None and previous is not None
+                and previous.digest == entry.digest
+            )
+        PRACTICUM_CACHE.inc(result='hit' if hit else 'miss')
+        if entry is None:
+            return False
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return hit
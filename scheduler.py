@@ -0,0 +1,137 @@
+import heapq
+import itertools
+import time
+
+from metrics import POLL_LAG
+from ratelimit import TokenBucket, backoff_delay
+
+MIN_INTERVAL = 60
+REVIEWING_INTERVAL = 120
+BASE_INTERVAL = 600
+MAX_INTERVAL = 3600
+REVIEW_HOURS = range(9, 22)
+REQUEST_BUDGET = 10
+
+
+class PollScheduler:
+    """Heap of poll deadlines with interval adapted to tenant activity.
+
+    Right after status change tenant is polled every `min_interval`, while
+    homework is on review or during review hours - every `reviewing_interval`
+    or `base_interval`, and without activity interval doubles up to
+    `max_interval`. All polls share a budget of `budget` requests per second.
+    """
+
+    def __init__(self, min_interval: float = MIN_INTERVAL,
+                 reviewing_interval: float = REVIEWING_INTERVAL,
+                 base_interval: float = BASE_INTERVAL,
+                 max_interval: float = MAX_INTERVAL,
+                 budget: float = REQUEST_BUDGET,
+                 review_hours=REVIEW_HOURS, clock=time.monotonic) -> None:
+        """Prepare scheduler with intervals and request budget."""
+        self.min_interval = min_interval
+        self.reviewing_interval = reviewing_interval
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.review_hours = review_hours
+        self.clock = clock
+        self.budget = TokenBucket(budget, clock=clock)
+        self._heap = []
+        self._counter = itertools.count()
+        self._deadlines = {}
+        self._intervals = {}
+        self._reviewing = {}
+        self._failures = {}
+
+    def __len__(self) -> int:
+        """Return number of scheduled tenants."""
+        return len(self._deadlines)
+
+    def add(self, tenant_id: str, delay: float = 0) -> None:
+        """Schedule poll of tenant in `delay` seconds."""
+        deadline = self.clock() + delay
+        self._deadlines[tenant_id] = deadline
+        self._intervals.setdefault(tenant_id, self.base_interval)
+        heapq.heappush(self._heap, (deadline, next(self._counter), tenant_id))
+
+    def remove(self, tenant_id: str) -> None:
+        """Stop polling tenant."""
+        self._deadlines.pop(tenant_id, None)
+        self._intervals.pop(tenant_id, None)
+        self._reviewing.pop(tenant_id, None)
+        self._failures.pop(tenant_id, None)
+
+    def pop_due(self) -> list:
+        """Return tenants whose deadline passed, as many as budget allows."""
+        now = self.clock()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, tenant_id = self._heap[0]
+            if self._deadlines.get(tenant_id) != deadline:
+                heapq.heappop(self._heap)
+                continue
+            if not self.budget.consume():
+                break
+            heapq.heappop(self._heap)
+            del self._deadlines[tenant_id]
+            POLL_LAG.observe(now - deadline)
+            due.append(tenant_id)
+        return due
+
+    def sleep_time(self) -> float:
+        """Return seconds until next poll is due."""
+        while self._heap:
+            deadline, _, tenant_id = self._heap[0]
+            if self._deadlines.get(tenant_id) == deadline:
+                wait = max(0.0, deadline - self.clock())
+                return max(wait, self.budget.delay())
+            heapq.heappop(self._heap)
+        return self.base_interval
+
+    def lag(self) -> float:
+        """Return seconds for which the earliest due poll is late."""
+        while self._heap:
+            deadline, _, tenant_id = self._heap[0]
+            if self._deadlines.get(tenant_id) == deadline:
+                return max(0.0, self.clock() - deadline)
+            heapq.heappop(self._heap)
+        return 0.0
+
+    def record(self, tenant_id: str, homeworks: list) -> float:
+        """Reschedule tenant after poll which returned `homeworks`."""
+        self._failures.pop(tenant_id, None)
+        reviewing = self._reviewing.setdefault(tenant_id, set())
+        for homework in homeworks:
+            if homework.status == 'reviewing':
+                reviewing.add(homework.key)
+            else:
+                reviewing.discard(homework.key)
+
+        if homeworks:
+            interval = self.min_interval
+        elif reviewing:
+            interval = self.reviewing_interval
+        elif time.localtime().tm_hour in self.review_hours:
+            interval = self.base_interval
+        else:
+            interval = min(self._intervals[tenant_id] * 2, self.max_interval)
+        self._intervals[tenant_id] = interval
+        self.add(tenant_id, interval)
+        return interval
+
+    def record_error(self, tenant_id: str, delay: float = None) -> float:
+        """Reschedule tenant after failed poll.
+
+        Without explicit `delay` tenant waits full-jitter exponential backoff
+        by the number of failures in a row, so that tenants which failed
+        together do not retry together.
+        """
+        failures = self._failures.get(tenant_id, 0) + 1
+        self._failures[tenant_id] = failures
+        if delay is None:
+            delay = max(
+                self.min_interval,
+                backoff_delay(failures, self.base_interval, self.max_interval),
+            )
+        self.add(tenant_id, delay)
+        return delay
@@ -0,0 +1,140 @@
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+
+REPLICAS = 100
+SUPERVISE_INTERVAL = 1
+STOP_TIMEOUT = 30
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent hashing of tenants to shards.
+
+    Every shard owns `replicas` points on the ring, so when shard joins or
+    leaves only about 1/N of tenants move to other shards.
+    """
+
+    def __init__(self, nodes=(), replicas: int = REPLICAS) -> None:
+        """Put nodes on the ring."""
+        self.replicas = replicas
+        self._points = []
+        self._nodes = {}
+        for node in nodes:
+            self.add_node(node)
+
+    def __len__(self) -> int:
+        """Return number of nodes."""
+        return len(set(self._nodes.values()))
+
+    def add_node(self, node: str) -> None:
+        """Put shard on the ring."""
+        for replica in range(self.replicas):
+            point = _hash(f'{node}#{replica}')
+            self._nodes[point] = node
+            bisect.insort(self._points, point)
+
+    def remove_node(self, node: str) -> None:
+        """Take shard off the ring."""
+        for replica in range(self.replicas):
+            point = _hash(f'{node}#{replica}')
+            if self._nodes.get(point) == node:
+                del self._nodes[point]
+                self._points.remove(point)
+
+    def node_for(self, key: str) -> str:
+        """Return shard which owns key."""
+        if not self._points:
+            raise KeyError('Hash ring has no nodes')
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._nodes[self._points[index]]
+
+
+def split_tenants(tenants: list, ring: HashRing) -> dict:
+    """Group tenants by shard which owns their Practicum token."""
+    shards = {}
+    for tenant in tenants:
+        shards.setdefault(ring.node_for(tenant.token), []).append(tenant)
+    return shards
+
+
+def node_tenants(tenants: list, nodes: list, node: str) -> list:
+    """Return tenants which belong to `node` among `nodes`."""
+    if node not in nodes:
+        raise KeyError(f'Node {node} is not in SHARD_NODES {nodes}')
+    return split_tenants(tenants, HashRing(nodes)).get(node, [])
+
+
+def shard_names(processes: int) -> list:
+    """Return names of shard processes of one node."""
+    return [f'shard-{number}' for number in range(processes)]
+
+
+def process_tenants(tenants: list, processes: int, number: int) -> list:
+    """Return tenants of shard process `number` among `processes`."""
+    names = shard_names(processes)
+    return split_tenants(tenants, HashRing(names)).get(names[number], [])
+
+
+def handle_supervisor_signals(stopping: threading.Event,
+                              workers: dict) -> None:
+    """Set `stopping` on SIGTERM and SIGINT, pass SIGUSR1, SIGHUP on."""
+    def forward(signum, frame):
+        for _, worker in list(workers.values()):
+            if worker.is_alive():
+                os.kill(worker.pid, signum)
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda signum, frame: stopping.set())
+    # SIGUSR1 starts profiler and SIGHUP reloads configuration of shards.
+    for name in ('SIGUSR1', 'SIGHUP'):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), forward)
+
+
+def run_processes(processes: int, target, *args) -> None:
+    """Run `target(shard_number, *args)` in processes.
+
+    Every process selects its tenants by its number, so a restarted one
+    picks up the current roster. On SIGTERM or SIGINT processes get SIGTERM
+    and are waited for STOP_TIMEOUT seconds.
+    """
+    names = shard_names(processes)
+    context = multiprocessing.get_context('spawn')
+    workers = {}
+
+    def start(number: int, name: str) -> None:
+        worker = context.Process(
+            target=target, name=name,
+            args=(number,) + args,
+        )
+        worker.start()
+        workers[name] = (number, worker)
+        logging.info('%s is started', name)
+
+    stopping = threading.Event()
+    handle_supervisor_signals(stopping, workers)
+
+    for number, name in enumerate(names):
+        start(number, name)
+    while not stopping.wait(SUPERVISE_INTERVAL):
+        for name, (number, worker) in list(workers.items()):
+            if not worker.is_alive():
+                logging.error(
+                    '%s exited with code %s, restarting',
+                    name, worker.exitcode)
+                start(number, name)
+
+    for _, worker in workers.values():
+        worker.terminate()
+    for _, worker in workers.values():
+        worker.join(STOP_TIMEOUT)
+        if worker.is_alive():
+            worker.kill()
@@ -0,0 +1,262 @@
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+BATCH_SIZE = 100
+# Seconds to wait while another shard process writes to the database.
+BUSY_TIMEOUT = 30
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cursors (
+    tenant_id TEXT PRIMARY KEY,
+    cursor INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    tenant_id TEXT NOT NULL,
+    homework_id TEXT NOT NULL,
+    status TEXT,
+    comment_crc INTEGER NOT NULL,
+    PRIMARY KEY (tenant_id, homework_id)
+);
+CREATE TABLE IF NOT EXISTS schedule (
+    tenant_id TEXT PRIMARY KEY,
+    due REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id TEXT PRIMARY KEY,
+    chat_id NOT NULL,
+    text TEXT NOT NULL,
+    created REAL NOT NULL,
+    shard INTEGER NOT NULL DEFAULT 0
+);
+'''
+
+
+class StateStore(ABC):
+    """Storage of `from_date` cursor and homework snapshot of tenants."""
+
+    @abstractmethod
+    def load(self, tenant) -> None:
+        """Restore cursor and homework snapshot of tenant."""
+
+    @abstractmethod
+    def save(self, tenant, changed: dict) -> None:
+        """Save cursor of tenant with fingerprints changed in one poll."""
+
+    @abstractmethod
+    def save_due(self, tenant) -> None:
+        """Save time when tenant is due to be polled next."""
+
+    @abstractmethod
+    def add_pending(self, message_id: str, chat_id, text: str) -> None:
+        """Save message which is not delivered yet."""
+
+    @abstractmethod
+    def remove_pending(self, message_id: str) -> None:
+        """Forget message which is delivered or dropped."""
+
+    @abstractmethod
+    def load_pending(self) -> list:
+        """Return (id, chat_id, text) of undelivered messages in order."""
+
+    def flush(self) -> None:
+        """Write buffered changes."""
+
+    def close(self) -> None:
+        """Flush buffered changes and release resources."""
+        self.flush()
+
+
+class MemoryStateStore(StateStore):
+    """State store which lives only as long as the process."""
+
+    def __init__(self) -> None:
+        """Prepare empty store."""
+        self.cursors = {}
+        self.snapshots = {}
+        self.due = {}
+        self.pending = {}
+
+    def load(self, tenant) -> None:
+        """Restore cursor and homework snapshot of tenant."""
+        if tenant.id in self.cursors:
+            tenant.cursor = self.cursors[tenant.id]
+        tenant.snapshot.update(self.snapshots.get(tenant.id, {}))
+        tenant.due = self.due.get(tenant.id, tenant.due)
+
+    def save(self, tenant, changed: dict) -> None:
+        """Save cursor of tenant with fingerprints changed in one poll."""
+        self.cursors[tenant.id] = tenant.cursor
+        self.snapshots.setdefault(tenant.id, {}).update(changed)
+
+    def save_due(self, tenant) -> None:
+        """Save time when tenant is due to be polled next."""
+        self.due[tenant.id] = tenant.due
+
+    def add_pending(self, message_id: str, chat_id, text: str) -> None:
+        """Save message which is not delivered yet."""
+        self.pending[message_id] = (message_id, chat_id, text)
+
+    def remove_pending(self, message_id: str) -> None:
+        """Forget message which is delivered or dropped."""
+        self.pending.pop(message_id, None)
+
+    def load_pending(self) -> list:
+        """Return (id, chat_id, text) of undelivered messages in order."""
+        return list(self.pending.values())
+
+
+class SQLiteStateStore(StateStore):
+    """State store in SQLite database in WAL mode with batched writes.
+
+    Cursor and snapshot of one poll are always written in one transaction,
+    so after restart the bot neither skips updates nor repeats sent messages
+    except the ones from last unflushed batch.
+
+    All shard processes share one database, so a tenant keeps its state
+    when it moves to another shard. Messages are tagged with `shard` and
+    each of `shards` processes resends only its own ones, together with
+    those left by shards which no longer exist.
+    """
+
+    def __init__(self, path: str, batch_size: int = BATCH_SIZE,
+                 shard: int = 0, shards: int = 1) -> None:
+        """Open database and create its tables."""
+        self.batch_size = batch_size
+        self.shard = shard
+        self.shards = shards
+        self._lock = threading.Lock()
+        self._cursors = {}
+        self._snapshots = []
+        self._due = {}
+        self._pending = []
+        self._delivered = []
+        self.connection = sqlite3.connect(
+            path, timeout=BUSY_TIMEOUT, check_same_thread=False
+        )
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        columns = {
+            row[1] for row in self.connection.execute(
+                'PRAGMA table_info(outbox)'
+            )
+        }
+        if 'shard' not in columns:
+            with self.connection:
+                self.connection.execute(
+                    'ALTER TABLE outbox '
+                    'ADD COLUMN shard INTEGER NOT NULL DEFAULT 0'
+                )
+
+    def load(self, tenant) -> None:
+        """Restore cursor and homework snapshot of tenant."""
+        with self._lock:
+            row = self.connection.execute(
+                'SELECT cursor FROM cursors WHERE tenant_id = ?',
+                (tenant.id,),
+            ).fetchone()
+            rows = self.connection.execute(
+                'SELECT homework_id, status, comment_crc '
+                'FROM snapshots WHERE tenant_id = ?',
+                (tenant.id,),
+            ).fetchall()
+            due = self.connection.execute(
+                'SELECT due FROM schedule WHERE tenant_id = ?', (tenant.id,)
+            ).fetchone()
+        if row is not None:
+            tenant.cursor = row[0]
+        if due is not None:
+            tenant.due = due[0]
+        tenant.snapshot.update((key, tuple(rest)) for key, *rest in rows)
+
+    def save(self, tenant, changed: dict) -> None:
+        """Save cursor of tenant with fingerprints changed in one poll."""
+        with self._lock:
+            if tenant.cursor is not None:
+                self._cursors[tenant.id] = tenant.cursor
+            self._snapshots.extend(
+                (tenant.id, key) + fingerprint
+                for key, fingerprint in changed.items()
+            )
+        self._flush_if_full()
+
+    def save_due(self, tenant) -> None:
+        """Save time when tenant is due to be polled next."""
+        with self._lock:
+            self._due[tenant.id] = tenant.due
+        self._flush_if_full()
+
+    def add_pending(self, message_id: str, chat_id, text: str) -> None:
+        """Save message which is not delivered yet."""
+        with self._lock:
+            self._pending.append(
+                (message_id, chat_id, text, time.time(), self.shard)
+            )
+        self._flush_if_full()
+
+    def remove_pending(self, message_id: str) -> None:
+        """Forget message which is delivered or dropped."""
+        with self._lock:
+            self._delivered.append((message_id,))
+        self._flush_if_full()
+
+    def load_pending(self) -> list:
+        """Return (id, chat_id, text) of undelivered messages in order."""
+        with self._lock:
+            return self.connection.execute(
+                'SELECT id, chat_id, text FROM outbox '
+                'WHERE shard % ? = ? ORDER BY created',
+                (self.shards, self.shard),
+            ).fetchall()
+
+    def _flush_if_full(self) -> None:
+        with self._lock:
+            pending = (
+                len(self._cursors) + len(self._snapshots) + len(self._due)
+                + len(self._pending) + len(self._delivered)
+            )
+        if pending >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered cursors, snapshots and outbox in one transaction."""
+        with self._lock:
+            if not any((self._cursors, self._snapshots, self._due,
+                        self._pending, self._delivered)):
+                return
+            with self.connection:
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO snapshots '
+                    '(tenant_id, homework_id, status, comment_crc) '
+                    'VALUES (?, ?, ?, ?)',
+                    self._snapshots,
+                )
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO cursors VALUES (?, ?)',
+                    self._cursors.items(),
+                )
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO schedule VALUES (?, ?)',
+                    self._due.items(),
+                )
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO outbox '
+                    '(id, chat_id, text, created, shard) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    self._pending,
+                )
+                self.connection.executemany(
+                    'DELETE FROM outbox WHERE id = ?', self._delivered
+                )
+            self._cursors = {}
+            self._snapshots = []
+            self._due = {}
+            self._pending = []
+            self._delivered = []
+
+    def close(self) -> None:
+        """Flush buffered changes and close database."""
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import logging
+import sqlite3
+
+ROSTER_TABLE = 'tenants'
+
+
+class Tenant:
+    """Practicum token, Telegram chats and polling state of one student.
+
+    `chat_id` may be a list of chats subscribed to statuses of student,
+    the first of them is `chat_id` which also receives error reports.
+    """
+
+    __slots__ = (
+        'id', 'token', 'chat_id', 'chat_ids', 'headers',
+        'cursor', 'snapshot', 'due',
+    )
+
+    def __init__(self, token: str, chat_id, tenant_id: str = None) -> None:
+        """Keep token and chats of tenant."""
+        self.id = tenant_id or token_fingerprint(token)
+        self.token = token
+        if isinstance(chat_id, (list, tuple)):
+            self.chat_id = chat_id[0]
+            self.chat_ids = []
+            for chat in chat_id:
+                self.subscribe(chat)
+        else:
+            self.chat_id = chat_id
+            self.chat_ids = [chat_id]
+        self.headers = {'Authorization': f'OAuth {token}'}
+        self.cursor = None
+        self.snapshot = {}
+        self.due = None
+
+    def subscribe(self, chat_id) -> None:
+        """Send statuses of student to one more chat."""
+        if str(chat_id) not in map(str, self.chat_ids):
+            self.chat_ids.append(chat_id)
+
+    def __repr__(self) -> str:
+        """Show id and chats of tenant."""
+        return f'Tenant(id={self.id!r}, chat_ids={self.chat_ids!r})'
+
+
+def subscribe_tenants(tenants: list) -> list:
+    """Merge tenants with the same token into one with all their chats.
+
+    Every token is then polled once however many chats follow it. Merged
+    tenant keeps id and state of the first one.
+    """
+    merged = {}
+    for tenant in tenants:
+        first = merged.setdefault(tenant.token, tenant)
+        if first is not tenant:
+            for chat_id in tenant.chat_ids:
+                first.subscribe(chat_id)
+            logging.info(
+                'Tenant %s is merged into %s with the same token',
+                tenant.id, first.id,
+            )
+    return list(merged.values())
+
+
+def token_fingerprint(token: str) -> str:
+    """Return short id of token which is safe to write in logs."""
+    return hashlib.sha256(token.encode()).hexdigest()[:12]
+
+
+def load_roster(path: str) -> list:
+    """Load tenants from JSON file or SQLite database."""
+    if path.endswith('.json'):
+        rows = _read_json_roster(path)
+    elif path.endswith(('.db', '.sqlite', '.sqlite3')):
+        rows = _read_sqlite_roster(path)
+    else:
+        raise ValueError(f'Unsupported roster format: {path}')
+
+    tenants = []
+    for row in rows:
+        try:
+            tenants.append(
+                Tenant(row['token'], row['chat_id'], row.get('id'))
+            )
+        except KeyError as error:
+            raise KeyError(f'Roster entry without required key {error}')
+    return subscribe_tenants(tenants)
+
+
+def _read_json_roster(path: str) -> list:
+    with open(path, encoding='utf-8') as roster:
+        rows = json.load(roster)
+    if not isinstance(rows, list):
+        raise TypeError(
+            f'Expected type data - list, received - {type(rows)}'
+        )
+    return rows
+
+
+def _read_sqlite_roster(path: str) -> list:
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    try:
+        rows = connection.execute(
+            f'SELECT * FROM {ROSTER_TABLE}'
+        ).fetchall()
+    finally:
+        connection.close()
+    return [dict(row) for row in rows]
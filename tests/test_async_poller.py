@@ -0,0 +1,98 @@
+import asyncio
+from http import HTTPStatus
+
+
+class MockAsyncResponse:
+
+    def __init__(self, data=None, status=HTTPStatus.OK):
+        self.data = data
+        self.status = status
+        self.url = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+
+    async def json(self, **kwargs):
+        return self.data
+
+
+class MockRequest:
+
+    def __init__(self, session, response):
+        self.session = session
+        self.response = response
+
+    async def __aenter__(self):
+        self.session.active += 1
+        self.session.max_active = max(
+            self.session.max_active, self.session.active
+        )
+        await asyncio.sleep(0.01)
+        return self.response
+
+    async def __aexit__(self, *args):
+        self.session.active -= 1
+
+
+class MockSession:
+
+    def __init__(self, homeworks=None, status=HTTPStatus.OK):
+        self.homeworks = homeworks or []
+        self.status = status
+        self.active = 0
+        self.max_active = 0
+        self.sent = []
+
+    def get(self, url, headers=None, params=None):
+        assert headers['Authorization'].startswith('OAuth ')
+        assert 'from_date' in params
+        return MockRequest(self, MockAsyncResponse(
+            {'homeworks': self.homeworks, 'current_date': 100}, self.status
+        ))
+
+    def post(self, url, json=None):
+        self.sent.append((json['chat_id'], json['text']))
+        return MockRequest(self, MockAsyncResponse())
+
+
+class TestAsyncPoller:
+
+    def test_concurrency_limit(self):
+        from async_poller import AsyncPoller
+        from tenants import Tenant
+
+        session = MockSession([{'homework_name': 'hw', 'status': 'approved'}])
+        tenants = [Tenant(str(number), number) for number in range(20)]
+        poller = AsyncPoller('1234:abc', tenants, concurrency=5,
+                             session=session)
+        asyncio.run(poller.run_cycle())
+        assert session.max_active <= 5
+        assert sorted(chat_id for chat_id, _ in session.sent) == list(
+            range(20)
+        )
+        assert all(tenant.cursor == 100 for tenant in tenants)
+
+    def test_error_reported_once(self):
+        from async_poller import AsyncPoller
+        from tenants import Tenant
+
+        session = MockSession(status=HTTPStatus.INTERNAL_SERVER_ERROR)
+        tenant = Tenant('token', 1)
+        poller = AsyncPoller('1234:abc', [tenant], session=session)
+
+        async def two_cycles():
+            await poller.run_cycle()
+            await poller.run_cycle()
+
+        asyncio.run(two_cycles())
+        assert len(session.sent) == 1
+        assert 'Status code: 500' in session.sent[0][1]
+
+    def test_injected_scheduler_gets_tenants(self):
+        from async_poller import AsyncPoller
+        from scheduler import PollScheduler
+        from tenants import Tenant
+
+        scheduler = PollScheduler()
+        AsyncPoller('1234:abc', [Tenant('a', 1), Tenant('b', 2)],
+                    scheduler=scheduler)
+        assert len(scheduler) == 2, (
+            'Empty scheduler is falsy but must be used, not replaced'
+        )
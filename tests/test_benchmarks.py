@@ -0,0 +1,38 @@
+class TestBenchmark:
+
+    def test_run_benchmark_smoke(self):
+        from benchmarks.run_bench import run_benchmark
+
+        results = run_benchmark(
+            tenants=3, duration=1, poll_interval=0.5, churn=0,
+            practicum_latency=0, telegram_latency=0,
+        )
+        assert results['polls'] >= 3
+        assert results['sends'] == 9, (
+            'Every tenant must be notified about each of 3 homeworks once'
+        )
+        for key in ('polls_per_second', 'sends_per_second', 'rss_mb',
+                    'cpu_seconds', 'latency_p50', 'latency_p99'):
+            assert key in results
+
+    def test_regressions(self):
+        from benchmarks.run_bench import regressions
+
+        baseline = {'polls_per_second': 100, 'latency_p99': 1.0}
+        assert regressions(
+            {'polls_per_second': 95, 'latency_p99': 1.1}, baseline
+        ) == []
+        found = regressions(
+            {'polls_per_second': 50, 'latency_p99': 2.0}, baseline
+        )
+        assert len(found) == 2
+
+    def test_import_is_lazy(self):
+        from benchmarks.import_time import import_once, measure
+
+        _, modules = import_once('homework')
+        for name in ('telegram', 'requests', 'dotenv', 'http.server'):
+            assert name not in modules, (
+                f'Import of homework must not import {name}'
+            )
+        assert measure('homework', runs=3)['median'] < 1
@@ -0,0 +1,98 @@
+from http import HTTPStatus
+
+import pytest
+import requests
+from utils import FakeClock, MockResponse
+
+
+def fail(breaker, error):
+    try:
+        with breaker:
+            raise error
+    except type(error):
+        pass
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold_and_recovers(self):
+        from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+        from exeption import CircuitOpenError, HTTPStatusError
+
+        clock = FakeClock()
+        breaker = CircuitBreaker(
+            failure_threshold=3, reset_timeout=10, clock=clock
+        )
+        outage = HTTPStatusError(MockResponse(status_code=HTTPStatus.BAD_GATEWAY))
+        for _ in range(3):
+            fail(breaker, outage)
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            with breaker:
+                pass
+
+        clock.now = breaker.opened_until
+        with breaker:
+            assert breaker.state == HALF_OPEN
+            with pytest.raises(CircuitOpenError):
+                with breaker:
+                    pass
+        assert breaker.state == CLOSED
+
+    def test_failed_probe_opens_longer(self):
+        from breaker import OPEN, CircuitBreaker
+
+        clock = FakeClock()
+        breaker = CircuitBreaker(
+            failure_threshold=1, reset_timeout=10, clock=clock
+        )
+        fail(breaker, ConnectionError())
+        first_pause = breaker.retry_after()
+        assert 10 <= first_pause <= 20
+        clock.now = breaker.opened_until
+        fail(breaker, ConnectionError())
+        assert breaker.state == OPEN
+        assert breaker.trips == 2
+        assert 10 <= breaker.retry_after() <= 30
+
+    def test_client_errors_do_not_open(self):
+        from breaker import CLOSED, CircuitBreaker
+        from exeption import HTTPStatusError
+
+        breaker = CircuitBreaker(failure_threshold=1)
+        fail(breaker, HTTPStatusError(MockResponse(status_code=HTTPStatus.UNAUTHORIZED)))
+        fail(breaker, KeyError('homeworks'))
+        assert breaker.state == CLOSED
+
+
+class TestPollerBreaker:
+
+    def test_open_circuit_stops_requests(self, monkeypatch):
+        from breaker import CircuitBreaker
+        from poller import Poller
+        from tenants import Tenant
+
+        calls = []
+
+        def mock_get(*args, **kwargs):
+            calls.append(1)
+            return MockResponse(status_code=HTTPStatus.SERVICE_UNAVAILABLE)
+
+        class Bot:
+            def __init__(self):
+                self.chats = []
+
+            def send_message(self, chat_id, *args, **kwargs):
+                self.chats.append(chat_id)
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        tenants = [Tenant(str(number), number) for number in range(10)]
+        bot = Bot()
+        poller = Poller(
+            bot, tenants, breaker=CircuitBreaker(failure_threshold=2)
+        )
+        poller.run_cycle()
+        assert len(calls) == 2
+        assert set(bot.chats) <= {0, 1}, (
+            'Tenants must not be notified about paused requests'
+        )
@@ -0,0 +1,147 @@
+import json
+
+import pytest
+from utils import MockBot
+
+
+@pytest.fixture
+def config(monkeypatch, tmp_path):
+    import homework
+
+    saved = {name: getattr(homework, name) for name, _, _ in homework.SETTINGS}
+    env = tmp_path / '.env'
+    monkeypatch.setattr(homework, 'env_file', lambda: str(env))
+    for _, variable, _ in homework.SETTINGS:
+        monkeypatch.delenv(variable, raising=False)
+    yield env
+    for name, value in saved.items():
+        setattr(homework, name, value)
+
+
+class TestConfig:
+
+    def test_environment_wins_over_file(self, config, monkeypatch):
+        import homework
+
+        config.write_text("TOKEN_YP='file'\nDIGEST_WINDOW='0.5'\n")
+        monkeypatch.setenv('TOKEN_YP', 'environment')
+        values = homework.read_config()
+        assert values['PRACTICUM_TOKEN'] == 'environment'
+        assert values['DIGEST_WINDOW'] == 0.5
+        assert values['DIGEST_SIZE'] == homework.DEFAULTS['DIGEST_SIZE']
+
+    def test_reload_applies_settings_and_roster(self, config, tmp_path):
+        import homework
+        from health import Watchdog
+        from outbox import Outbox
+        from poller import Poller
+        from tenants import Tenant
+
+        roster = tmp_path / 'roster.json'
+        roster.write_text(json.dumps([
+            {'token': 'a', 'chat_id': 1, 'id': 'a'},
+            {'token': 'b', 'chat_id': 2, 'id': 'b'},
+        ]))
+        config.write_text(
+            f"TOKEN_TG='1234:abc'\nTENANTS_FILE='{roster}'\n"
+            "DIGEST_WINDOW='7'\nREQUEST_BUDGET='3'\nSTALL_TIMEOUT='9'\n"
+        )
+        homework.load_config()
+        outbox = Outbox(MockBot())
+        poller = Poller(
+            MockBot(), [Tenant('a', 1, 'a')], outbox=outbox,
+            watchdog=Watchdog(),
+        )
+        assert homework.reload_config(poller, outbox)
+        assert [tenant.id for tenant in poller.tenants] == ['a', 'b']
+        assert outbox.window == 7
+        assert poller.scheduler.budget.rate == 3
+        assert poller.watchdog.stall_timeout == 9
+
+        config.write_text(
+            "TOKEN_TG='1234:abc'\nTENANTS_FILE='missing.json'\n"
+            "DIGEST_WINDOW='1'\n"
+        )
+        assert not homework.reload_config(poller, outbox), (
+            'Configuration with broken roster must not be applied'
+        )
+        assert homework.DIGEST_WINDOW == 7
+        assert homework.TENANTS_FILE == str(roster)
+        assert len(poller.tenants) == 2
+
+    def test_restart_settings_kept_on_reload(self, config, tmp_path):
+        import homework
+        from outbox import Outbox
+        from poller import Poller
+
+        roster = tmp_path / 'roster.json'
+        roster.write_text(json.dumps([
+            {'token': str(number), 'chat_id': number}
+            for number in range(100)
+        ]))
+        config.write_text(
+            f"TOKEN_TG='1234:abc'\nTENANTS_FILE='{roster}'\n"
+            "SHARD_PROCESSES='2'\n"
+        )
+        homework.load_config()
+        tenants = homework.select_tenants(homework.load_tenants(), 0)
+        outbox = Outbox(MockBot())
+        poller = Poller(MockBot(), tenants, outbox=outbox)
+        config.write_text(
+            f"TOKEN_TG='1234:abc'\nTENANTS_FILE='{roster}'\n"
+            "SHARD_PROCESSES='4'\nWEBHOOK_PORT='8080'\nDIGEST_WINDOW='5'\n"
+        )
+        assert homework.reload_config(poller, outbox, process=0)
+        assert homework.SHARD_PROCESSES == 2
+        assert homework.WEBHOOK_PORT is None
+        assert homework.DIGEST_WINDOW == 5
+        assert [tenant.id for tenant in poller.tenants] == [
+            tenant.id for tenant in tenants
+        ], 'Shard must keep its slice until restart'
+        assert poller.scheduler.base_interval == homework.POLL_INTERVAL
+
+    @pytest.mark.parametrize('setting', [
+        "WEBHOOK_PORT='8080'", "RECORD_TRAFFIC='capture.jsonl'",
+    ])
+    def test_async_mode_refuses_sync_features(self, config, monkeypatch,
+                                              setting):
+        import homework
+        import log_config
+
+        monkeypatch.setattr(log_config, 'setup_logging', lambda *args: None)
+        config.write_text(
+            "TOKEN_TG='1234:abc'\nTOKEN_YP='token'\nTG_ID='1'\n"
+            f"POLL_MODE='async'\n{setting}\n"
+        )
+        with pytest.raises(SystemExit):
+            homework.main()
+
+    def test_example_file_is_valid(self, config):
+        import os
+        import shutil
+
+        import homework
+
+        shutil.copy(
+            os.path.join(os.path.dirname(homework.__file__), '.env.example'),
+            config,
+        )
+        homework.load_config()
+        for name in (
+            'TENANTS_FILE', 'SHARD_NODES', 'SHARD_ID', 'RECORD_TRAFFIC',
+            'WEBHOOK_PORT', 'WEBHOOK_SECRET',
+        ):
+            assert getattr(homework, name) is None, (
+                f'Optional {name} must stay unset in .env.example'
+            )
+
+    def test_async_concurrency_configured(self, config):
+        import homework
+        from tenants import Tenant
+
+        config.write_text(
+            "TOKEN_TG='1234:abc'\nPOLL_MODE='async'\nCONCURRENCY='7'\n"
+        )
+        homework.load_config()
+        poller = homework.make_poller(None, [Tenant('token', 1)])
+        assert poller.concurrency == 7
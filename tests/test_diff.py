@@ -0,0 +1,69 @@
+class TestDiff:
+
+    def homework(self, homework_id, status, comment='', name='hw',
+                 date='2022-01-01T00:00:00Z'):
+        from models import Homework
+
+        return Homework(homework_id, name, status, comment, date)
+
+    def test_new_and_changed_homeworks(self):
+        from diff import StatusChanged, diff, fingerprint
+
+        old = self.homework(1, 'reviewing')
+        snapshot = {'1': fingerprint(old)}
+        events = list(diff(snapshot, [
+            self.homework(1, 'approved'), self.homework(2, 'reviewing'),
+        ]))
+        assert [type(event) for event in events] == [
+            StatusChanged, StatusChanged
+        ]
+        assert (events[0].old_status, events[0].new_status) == (
+            'reviewing', 'approved'
+        )
+        assert events[1].old_status is None
+        assert 'Ура!' in events[0].message()
+
+    def test_same_names_do_not_collide(self):
+        from diff import diff
+
+        homeworks = [
+            self.homework(1, 'approved', name='hw'),
+            self.homework(2, 'rejected', name='hw'),
+        ]
+        snapshot = {}
+        for event in diff(snapshot, homeworks):
+            snapshot[event.key] = event.fingerprint
+        assert len(snapshot) == 2
+        assert list(diff(snapshot, homeworks)) == []
+
+    def test_only_real_transitions(self):
+        from diff import CommentChanged, diff, fingerprint
+
+        snapshot = {'1': fingerprint(self.homework(1, 'rejected', 'fix'))}
+        redated = self.homework(1, 'rejected', 'fix', date='2022-02-01')
+        assert list(diff(snapshot, [redated])) == []
+        assert fingerprint(redated) == snapshot['1'], (
+            'Snapshot must not differ from homework which only got new date'
+        )
+        events = list(diff(snapshot, [
+            self.homework(1, 'rejected', 'fix tests')
+        ]))
+        assert [type(event) for event in events] == [CommentChanged]
+        assert 'fix tests' in events[0].message()
+
+    def test_messages_formatted_lazily(self, monkeypatch):
+        import diff
+
+        formatted = []
+        monkeypatch.setattr(
+            diff, 'parse_status', lambda homework: formatted.append(homework)
+        )
+        homeworks = [self.homework(i, 'approved') for i in range(300)]
+        snapshot = {
+            str(i): diff.fingerprint(homework)
+            for i, homework in enumerate(homeworks)
+        }
+        homeworks[5] = self.homework(5, 'rejected')
+        for event in diff.diff(snapshot, homeworks):
+            event.message()
+        assert formatted == [homeworks[5]]
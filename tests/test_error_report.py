@@ -0,0 +1,110 @@
+from http import HTTPStatus
+
+import requests
+from utils import FakeClock, MockBot, MockResponse
+
+
+class TestErrorReport:
+
+    def test_fingerprint_ignores_variable_parts(self):
+        from error_report import fingerprint
+        from exeption import HTTPStatusError
+
+        first = MockResponse({}, HTTPStatus.BAD_GATEWAY)
+        second = MockResponse({}, HTTPStatus.SERVICE_UNAVAILABLE)
+        second.url += '?from_date=2'
+        assert fingerprint(HTTPStatusError(first)) == fingerprint(
+            HTTPStatusError(second)
+        )
+        assert fingerprint(KeyError('a')) != fingerprint(TypeError('a'))
+        assert fingerprint(KeyError('Unknown status a')) != fingerprint(
+            KeyError('Unknown status b')
+        )
+
+    def test_error_frames_released(self):
+        import gc
+        import weakref
+
+        from error_report import ErrorAggregator
+
+        class Response:
+            pass
+
+        def poll(response):
+            raise KeyError('Unknown status')
+
+        response = Response()
+        alive = weakref.ref(response)
+        errors = ErrorAggregator()
+        try:
+            poll(response)
+        except KeyError as error:
+            errors.record('a', error)
+        del response
+        gc.collect()
+        assert alive() is None, 'Recorded error must not keep poll frames'
+        assert 'Unknown status' in errors.resolve('a')
+
+    def test_repeats_reported_once_per_window(self):
+        from error_report import ErrorAggregator
+
+        clock = FakeClock()
+        errors = ErrorAggregator(window=60, clock=clock)
+        assert errors.record('a', KeyError('boom')).startswith(
+            'Program error'
+        )
+        assert errors.record('b', KeyError('boom')) is not None, (
+            'Errors of different tenants must be reported separately'
+        )
+        for clock.now in range(1, 60, 10):
+            assert errors.record('a', KeyError('boom')) is None
+        clock.now = 65
+        summary = errors.record('a', KeyError('boom'))
+        assert 'repeated 7 times' in summary
+        assert errors.record('a', TypeError('other')) is not None
+
+    def test_resolved_and_expired_errors(self):
+        from error_report import ErrorAggregator
+
+        clock = FakeClock()
+        errors = ErrorAggregator(window=60, max_entries=2, clock=clock)
+        assert errors.resolve('a') is None
+        errors.record('a', KeyError('boom'))
+        errors.record('a', KeyError('boom'))
+        assert 'after 2 failures' in errors.resolve('a')
+        assert errors.resolve('a') is None
+
+        errors.record('a', KeyError('boom'))
+        clock.now = 60
+        errors.record('b', KeyError('boom'))
+        assert len(errors) == 1, 'Error not seen for window must expire'
+        assert errors.resolve('a') is None
+        errors.record('c', KeyError('boom'))
+        errors.record('d', KeyError('boom'))
+        assert len(errors) == 2
+        assert errors.resolve('b') is None
+
+    def test_outage_sends_one_summary_and_resolved_notice(self,
+                                                          monkeypatch):
+        from breaker import CircuitBreaker
+        from error_report import ErrorAggregator
+        from poller import Poller
+        from tenants import Tenant
+
+        responses = [MockResponse({}, HTTPStatus.INTERNAL_SERVER_ERROR)] * 5
+        responses.append(MockResponse({'homeworks': [], 'current_date': 1}))
+        monkeypatch.setattr(
+            requests, 'get', lambda *args, **kwargs: responses.pop(0)
+        )
+        bot = MockBot()
+        tenant = Tenant('a', 1)
+        poller = Poller(
+            bot, [tenant], breaker=CircuitBreaker(failure_threshold=10),
+            errors=ErrorAggregator(window=3600),
+        )
+        for _ in range(6):
+            poller.poll_scheduled(tenant)
+        assert len(bot.sent) == 2
+        assert bot.sent[0][1].startswith('Program error')
+        assert 'resolved after 5 failures' in bot.sent[1][1]
+        assert len(poller.errors) == 0
@@ -0,0 +1,24 @@
+class TestFileWatcher:
+
+    def test_changed_files_reported(self, tmp_path):
+        from file_watch import FileWatcher
+
+        env = tmp_path / '.env'
+        roster = tmp_path / 'roster.json'
+        env.write_text('A=1\n')
+        calls = []
+        watcher = FileWatcher([str(env), str(roster), ''], calls.append)
+        assert watcher.check() == []
+
+        env.write_text('A=12\n')
+        roster.write_text('[]')
+        assert sorted(watcher.check()) == sorted([str(env), str(roster)])
+        assert watcher.check() == []
+        env.unlink()
+        assert watcher.check() == [str(env)]
+        assert len(calls) == 2
+
+        other = tmp_path / 'other.json'
+        watcher.watch([str(other)])
+        other.write_text('[]')
+        assert watcher.check() == [str(other)]
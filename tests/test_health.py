@@ -0,0 +1,103 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import requests
+from utils import FakeClock
+
+
+class TestWatchdog:
+
+    def test_stalled_work_fails_probes(self):
+        from health import Watchdog
+
+        clock = FakeClock()
+        stalled = []
+        watchdog = Watchdog(
+            stall_timeout=10, max_lag=5, on_stall=stalled.extend, clock=clock
+        )
+        assert watchdog.liveness()[0]
+        assert not watchdog.readiness()[0], (
+            'Worker is not ready before the first poll loop'
+        )
+        watchdog.heartbeat(sleep=30, lag=1)
+        assert watchdog.readiness()[0]
+
+        with watchdog.track('poll', 'tenant'):
+            clock.now = 11
+            live, details = watchdog.liveness()
+            assert not live
+            assert details['stalled'][0]['name'] == 'tenant'
+            assert watchdog.check() == []
+            clock.now = 21
+            assert len(watchdog.check()) == 1
+            assert stalled[0]['kind'] == 'poll'
+        assert watchdog.liveness()[0]
+
+    def test_missed_heartbeat_and_lag(self):
+        from health import Watchdog
+
+        clock = FakeClock()
+        watchdog = Watchdog(stall_timeout=10, max_lag=5, clock=clock)
+        watchdog.heartbeat(sleep=30, lag=6)
+        ready, details = watchdog.readiness()
+        assert not ready and details['lag'] == 6
+        watchdog.heartbeat(lag=0)
+        assert watchdog.readiness()[0]
+        clock.now = 41
+        assert not watchdog.liveness()[0], (
+            'Poll loop which overslept its sleep must not be live'
+        )
+
+    def test_probe_endpoints(self):
+        from admin_server import start_admin_server
+        from health import Watchdog
+
+        clock = FakeClock()
+        watchdog = Watchdog(stall_timeout=10, clock=clock)
+        watchdog.register()
+        server = start_admin_server(0)
+        url = f'http://127.0.0.1:{server.server_address[1]}'
+        try:
+            healthz = requests.get(url + '/healthz')
+            readyz = requests.get(url + '/readyz')
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert healthz.status_code == HTTPStatus.OK
+        assert readyz.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        assert json.loads(readyz.text)['status'] == 'fail'
+
+    def test_stuck_async_request_cancelled(self):
+        from async_poller import AsyncPoller
+        from health import Watchdog
+        from tenants import Tenant
+
+        class HangingRequest:
+
+            async def __aenter__(self):
+                await asyncio.sleep(60)
+
+            async def __aexit__(self, *args):
+                pass
+
+        class Session:
+
+            def get(self, *args, **kwargs):
+                return HangingRequest()
+
+        class Outbox:
+
+            def __init__(self):
+                self.sent = []
+
+            def enqueue(self, chat_id, text):
+                self.sent.append(text)
+
+        outbox = Outbox()
+        poller = AsyncPoller(
+            '1234:abc', [Tenant('token', 1)], session=Session(),
+            outbox=outbox, watchdog=Watchdog(stall_timeout=0.05),
+        )
+        asyncio.run(poller.run_cycle())
+        assert 'No answer from API' in outbox.sent[0]
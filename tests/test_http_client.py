@@ -0,0 +1,116 @@
+import json
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class StatusesHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    client_ports = set()
+
+    def do_GET(self):
+        self.client_ports.add(self.client_address[1])
+        body = json.dumps({'homeworks': [], 'current_date': 1}).encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    StatusesHandler.client_ports = set()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StatusesHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown()
+    server.server_close()
+
+
+class StubClient:
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        self.calls.append(kwargs)
+
+        class Response:
+            status_code = HTTPStatus.OK
+
+            def json(self):
+                return {'homeworks': [], 'current_date': 7}
+
+        return Response()
+
+
+class TestPracticumClient:
+
+    def test_connection_reused(self, local_server):
+        from http_client import PracticumClient
+
+        client = PracticumClient(pool_size=2)
+        try:
+            for _ in range(3):
+                response = client.get(local_server, params={'from_date': 0})
+                assert response.json()['current_date'] == 1
+        finally:
+            client.close()
+        assert len(StatusesHandler.client_ports) == 1, (
+            'Keep-alive connection must be reused between requests'
+        )
+
+    def test_injected_client_keeps_own_timeout(self):
+        import homework
+
+        stub = StubClient()
+        assert homework.fetch_homework_statuses(
+            {'Authorization': 'OAuth token'}, 1, client=stub
+        )['current_date'] == 7
+        assert 'timeout' not in stub.calls[0]
+
+    def test_poller_uses_its_client(self, monkeypatch):
+        import requests
+
+        from poller import Poller
+        from tenants import Tenant
+
+        def unexpected(*args, **kwargs):
+            raise AssertionError('Bare requests must not be used')
+
+        monkeypatch.setattr(requests, 'get', unexpected)
+        stub = StubClient()
+        tenant = Tenant('token', 1)
+        Poller(None, [tenant], client=stub).poll_tenant(tenant)
+        assert len(stub.calls) == 1
+
+    def test_requests_fallback_gets_timeout(self, monkeypatch):
+        import requests
+
+        import homework
+
+        stub = StubClient()
+        monkeypatch.setattr(homework, 'CONNECT_TIMEOUT', 2)
+        monkeypatch.setattr(requests, 'get', stub.get)
+        assert homework.get_api_answer(1)['current_date'] == 7
+        assert stub.calls[0]['timeout'] == (2, homework.READ_TIMEOUT)
+
+    def test_client_uses_configured_timeout(self, monkeypatch):
+        from http_client import PracticumClient
+
+        client = PracticumClient(connect_timeout=2, read_timeout=3)
+        calls = []
+        monkeypatch.setattr(
+            client.session, 'get',
+            lambda url, **kwargs: calls.append(kwargs),
+        )
+        client.get('url')
+        client.close()
+        assert calls[0]['timeout'] == (2, 3)
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+import requests
+
+BODY = json.dumps({
+    'current_date': 1234567,
+    'homeworks': [
+        {'id': n, 'homework_name': f'работа {n}', 'status': 'approved',
+         'reviewer_comment': 'Всё «хорошо»', 'date_updated': None}
+        for n in range(20)
+    ],
+    'extra': [1, {'a': True}],
+}, ensure_ascii=False, indent=1).encode()
+
+
+class MockStreamResponse:
+    status_code = 200
+
+    def __init__(self, body, chunk_size):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.received = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), self.chunk_size):
+            self.received = start + self.chunk_size
+            yield self.body[start:start + self.chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class MockBot:
+
+    def __init__(self, response):
+        self.response = response
+        self.received_before_send = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.received_before_send.append(self.response.received)
+
+
+class TestArrayStream:
+
+    def decode(self, body, chunk_size):
+        from json_stream import ArrayStream
+
+        parser = ArrayStream('homeworks')
+        items = []
+        for start in range(0, len(body), chunk_size):
+            items.extend(parser.feed(body[start:start + chunk_size]))
+        items.extend(parser.close())
+        return items, parser.fields
+
+    @pytest.mark.parametrize('chunk_size', [1, 3, 7, 1024, 1 << 20])
+    def test_same_as_json_loads(self, chunk_size):
+        items, fields = self.decode(BODY, chunk_size)
+        expected = json.loads(BODY)
+        assert items == expected['homeworks']
+        assert fields == {
+            'current_date': expected['current_date'],
+            'extra': expected['extra'],
+        }
+
+    @pytest.mark.parametrize('body', [
+        b'{"homeworks": [{"id": 1}', b'{"homeworks": [] "x": 1}',
+        b'{"homeworks": []} []', b'{"current_date": 12',
+    ])
+    def test_invalid_json(self, body):
+        with pytest.raises(json.JSONDecodeError):
+            self.decode(body, 2)
+
+    @pytest.mark.parametrize('body', [b'[]', b'{"homeworks": {}}'])
+    def test_unexpected_types(self, body):
+        with pytest.raises(TypeError):
+            self.decode(body, 2)
+
+
+class TestStreamingPoller:
+
+    def test_first_message_sent_before_body_received(self, monkeypatch):
+        from poller import Poller
+        from tenants import Tenant
+
+        response = MockStreamResponse(BODY, 64)
+        monkeypatch.setattr(requests, 'get', lambda *a, **k: response)
+        bot = MockBot(response)
+        tenant = Tenant('token', 1)
+        homeworks = Poller(bot, [tenant], stream=True).poll_tenant(tenant)
+        assert len(homeworks) == len(bot.received_before_send) == 20
+        assert bot.received_before_send[0] < len(BODY) / 2
+        assert tenant.cursor == 1234567
+        assert response.closed
+
+    def test_stream_closed_when_send_fails(self, monkeypatch):
+        from poller import Poller
+        from tenants import Tenant
+
+        class FailingBot:
+
+            def send_message(self, *args, **kwargs):
+                raise ConnectionError('Telegram is down')
+
+        response = MockStreamResponse(BODY, 64)
+        monkeypatch.setattr(requests, 'get', lambda *a, **k: response)
+        tenant = Tenant('token', 1)
+        poller = Poller(FailingBot(), [tenant], stream=True)
+        with pytest.raises(KeyError):
+            poller.poll_tenant(tenant)
+        assert response.received < len(BODY)
+        assert response.closed, 'Unread stream must release its connection'
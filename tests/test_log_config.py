@@ -0,0 +1,92 @@
+import atexit
+import io
+import json
+import logging
+
+
+class CountingArg:
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return 'arg'
+
+
+class TestLogging:
+
+    def make_record(self, msg, *args, level=logging.ERROR, **extra):
+        record = logging.LogRecord(
+            'bot', level, 'homework.py', 10, msg, args, None
+        )
+        record.__dict__.update(extra)
+        return record
+
+    def test_rate_limit_before_formatting(self):
+        from log_config import RateLimitFilter
+
+        rate_limit = RateLimitFilter(window=60, burst=2)
+        arg = CountingArg()
+        passed = [
+            rate_limit.filter(self.make_record('Program error: %s', arg))
+            for _ in range(5)
+        ]
+        assert passed == [True, True, False, False, False]
+        assert arg.formatted == 0
+
+    def test_rate_limit_per_tenant_and_error(self):
+        from log_config import RateLimitFilter
+
+        rate_limit = RateLimitFilter(window=60, burst=1)
+        outage = [
+            rate_limit.filter(self.make_record(
+                'Program error: %s', ConnectionError('500'), tenant='a'
+            ))
+            for _ in range(3)
+        ]
+        assert outage == [True, False, False]
+        assert rate_limit.filter(self.make_record(
+            'Program error: %s', ConnectionError('500'), tenant='b'
+        )), 'Errors of other tenants must pass'
+        assert rate_limit.filter(self.make_record(
+            'Program error: %s', KeyError('status'), tenant='a'
+        )), 'New error must not hide behind an outage'
+
+    def test_rate_limit_ignores_info(self):
+        from log_config import RateLimitFilter
+
+        rate_limit = RateLimitFilter(window=60, burst=1)
+        assert all(
+            rate_limit.filter(self.make_record('sent', level=logging.INFO))
+            for _ in range(3)
+        )
+
+    def test_json_formatter_extra_fields(self):
+        from log_config import JSONFormatter
+
+        line = JSONFormatter().format(self.make_record(
+            'Program error: %s', 'boom', tenant='abc', latency=0.5
+        ))
+        data = json.loads(line)
+        assert data['message'] == 'Program error: boom'
+        assert data['tenant'] == 'abc'
+        assert data['latency'] == 0.5
+        assert data['level'] == 'ERROR'
+
+    def test_json_mode_writes_from_background_thread(self):
+        from log_config import setup_logging
+
+        root = logging.getLogger()
+        handlers, level = root.handlers[:], root.level
+        stream = io.StringIO()
+        listener = setup_logging('json', stream=stream)
+        try:
+            logging.info('Polled %s', 'tenant', extra={'tenant': 't1'})
+        finally:
+            listener.stop()
+            atexit.unregister(listener.stop)
+            root.handlers, root.level = handlers, level
+        data = json.loads(stream.getvalue().splitlines()[-1])
+        assert data['message'] == 'Polled tenant'
+        assert data['tenant'] == 't1'
@@ -0,0 +1,101 @@
+import threading
+from http import HTTPStatus
+
+import requests
+from utils import MockResponse
+
+
+class TestMetrics:
+
+    def test_counter_merges_thread_shards(self):
+        from metrics import Counter, Registry
+
+        registry = Registry()
+        counter = Counter('events_total', 'Events.', ('kind',),
+                          registry=registry)
+
+        def record():
+            for _ in range(1000):
+                counter.inc(kind='poll')
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert counter.value(kind='poll') == 4000
+        assert 'events_total{kind="poll"} 4000' in registry.render()
+
+    def test_finished_threads_release_shards(self):
+        import gc
+
+        from metrics import Counter, Histogram, Registry
+
+        registry = Registry()
+        counter = Counter('requests_total', 'Requests.', registry=registry)
+        histogram = Histogram('latency_seconds', 'Latency.',
+                              buckets=(1,), registry=registry)
+
+        def record():
+            counter.inc()
+            histogram.observe(0.5)
+
+        for _ in range(50):
+            thread = threading.Thread(target=record)
+            thread.start()
+            thread.join()
+        del thread
+        gc.collect()
+        assert len(counter._shards) <= 1
+        assert len(histogram._shards) <= 1
+        assert counter.value() == 50
+        assert histogram.count() == 50
+
+    def test_histogram_render(self):
+        from metrics import Histogram, Registry
+
+        registry = Registry()
+        histogram = Histogram('latency_seconds', 'Latency.', ('status',),
+                              buckets=(0.1, 1), registry=registry)
+        histogram.observe(0.05, status=200)
+        histogram.observe(0.5, status=200)
+        histogram.observe(5, status=200)
+        text = registry.render()
+        assert '# TYPE latency_seconds histogram' in text
+        assert 'latency_seconds_bucket{status="200",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{status="200",le="1"} 2' in text
+        assert 'latency_seconds_bucket{status="200",le="+Inf"} 3' in text
+        assert 'latency_seconds_count{status="200"} 3' in text
+
+    def test_hot_paths_instrumented(self, monkeypatch):
+        import homework
+        from metrics import PRACTICUM_LATENCY, UNKNOWN_STATUSES
+
+        monkeypatch.setattr(requests, 'get', lambda *a, **k: MockResponse(
+            {'homeworks': [], 'current_date': 1}
+        ))
+        before = PRACTICUM_LATENCY.count(status=200)
+        homework.get_api_answer(1)
+        assert PRACTICUM_LATENCY.count(status=200) == before + 1
+
+        before = UNKNOWN_STATUSES.value(status='lost')
+        try:
+            homework.parse_status({'homework_name': 'hw', 'status': 'lost'})
+        except KeyError:
+            pass
+        assert UNKNOWN_STATUSES.value(status='lost') == before + 1
+
+    def test_metrics_endpoint(self):
+        from admin_server import start_admin_server
+        import metrics  # noqa: F401
+
+        server = start_admin_server(0)
+        try:
+            response = requests.get(
+                f'http://127.0.0.1:{server.server_address[1]}/metrics'
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert response.status_code == HTTPStatus.OK
+        assert 'practicum_request_seconds' in response.text
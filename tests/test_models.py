@@ -0,0 +1,76 @@
+import pytest
+
+
+class TestModels:
+
+    def test_response_parsed_in_one_pass(self):
+        from models import Homework, StatusResponse
+
+        response = StatusResponse.from_json({
+            'homeworks': [{
+                'id': 1, 'homework_name': 'hw', 'status': 'approved',
+                'reviewer_comment': 'ok', 'date_updated': '2022',
+            }],
+            'current_date': 100,
+        })
+        assert response.current_date == 100
+        homework, = response.homeworks
+        assert isinstance(homework, Homework)
+        assert (homework.key, homework.status) == ('1', 'approved')
+        assert not hasattr(homework, '__dict__')
+
+    def test_statuses_interned(self):
+        from models import Homework
+
+        first = Homework.from_dict({'status': ''.join(['appr', 'oved'])})
+        second = Homework.from_dict({'status': ''.join(['approv', 'ed'])})
+        assert first.status is second.status
+
+    @pytest.mark.parametrize('data, error', [
+        ([], TypeError),
+        ({}, KeyError),
+        ({'homeworks': {}}, TypeError),
+        ({'current_date': 1}, TypeError),
+        ({'homeworks': ['hw']}, TypeError),
+    ])
+    def test_invalid_response(self, data, error):
+        from models import StatusResponse
+
+        with pytest.raises(error):
+            StatusResponse.from_json(data)
+
+    def test_parse_status_accepts_model(self):
+        import homework
+        from models import Homework
+
+        message = homework.parse_status(Homework(1, 'hw', 'rejected'))
+        assert message == homework.parse_status(
+            {'homework_name': 'hw', 'status': 'rejected'}
+        )
+
+    def test_stream_keeps_only_statuses(self):
+        import json
+
+        from models import StatusStream
+
+        body = json.dumps({
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw', 'status': 'reviewing',
+                 'reviewer_comment': 'long comment'},
+                {'homework_name': 'old', 'status': 'approved'},
+            ],
+            'current_date': 100,
+        }).encode()
+        response = StatusStream([body[:20], body[20:]])
+        assert [homework.key for homework in response] == ['1', 'old']
+        assert response.current_date == 100
+        assert response.statuses == {'1': 'reviewing', 'old': 'approved'}
+        assert [
+            (homework.key, homework.status) for homework in response.homeworks
+        ] == [('1', 'reviewing'), ('old', 'approved')]
+
+    def test_malformed_stream(self):
+        from models import StatusStream
+
+        with pytest.raises(KeyError):
+            list(StatusStream([b'{"homeworks": [{"id": 1,', b'}']))
@@ -0,0 +1,137 @@
+from telegram.error import BadRequest, RetryAfter, TimedOut
+from utils import FakeClock, MockBot
+
+
+class FlakyBot(MockBot):
+
+    def __init__(self, errors=None):
+        super().__init__()
+        self.errors = list(errors or [])
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        super().send_message(chat_id, text, **kwargs)
+
+
+class TestOutbox:
+
+    def test_chat_rate_limit_and_order(self):
+        from outbox import Outbox
+
+        clock = FakeClock()
+        bot = FlakyBot()
+        outbox = Outbox(bot, chat_rate=1, clock=clock)
+        for text in ('first', 'second'):
+            outbox.enqueue(1, text)
+        outbox.enqueue(2, 'other')
+        assert outbox.process()
+        assert outbox.process()
+        assert not outbox.process(), (
+            'Second message to the same chat must wait for rate limit'
+        )
+        clock.now = 1
+        assert outbox.process()
+        assert bot.sent == [(1, 'first'), (2, 'other'), (1, 'second')]
+        assert len(outbox) == 0
+
+    def test_retry_after_honoured(self):
+        from outbox import Outbox
+
+        clock = FakeClock()
+        bot = FlakyBot([RetryAfter(30)])
+        outbox = Outbox(bot, clock=clock)
+        outbox.enqueue(1, 'text')
+        assert outbox.process()
+        clock.now = 29
+        assert not outbox.process()
+        clock.now = 30
+        assert outbox.process()
+        assert bot.sent == [(1, 'text')]
+
+    def test_transient_error_retried_permanent_dropped(self):
+        from outbox import Outbox
+
+        clock = FakeClock()
+        bot = FlakyBot([TimedOut(), BadRequest('chat not found')])
+        outbox = Outbox(bot, clock=clock)
+        outbox.enqueue(1, 'text')
+        outbox.process()
+        assert len(outbox) == 1
+        clock.now = 100
+        outbox.process()
+        assert len(outbox) == 0
+        assert bot.sent == []
+
+    def test_pending_messages_survive_restart(self, tmp_path):
+        from outbox import Outbox
+        from state import SQLiteStateStore
+
+        path = str(tmp_path / 'state.sqlite3')
+        store = SQLiteStateStore(path)
+        outbox = Outbox(FlakyBot(), store)
+        outbox.enqueue(1, 'pending')
+        store.close()
+
+        store = SQLiteStateStore(path)
+        bot = FlakyBot()
+        outbox = Outbox(bot, store)
+        assert outbox.process()
+        assert bot.sent == [(1, 'pending')]
+        store.close()
+        assert SQLiteStateStore(path).load_pending() == []
+
+    def test_messages_coalesced_within_window(self):
+        from outbox import DIGEST_SEPARATOR, Outbox
+
+        clock = FakeClock()
+        bot = FlakyBot()
+        outbox = Outbox(bot, clock=clock, window=5, digest_size=10)
+        outbox.enqueue(1, 'first')
+        clock.now = 4
+        outbox.enqueue(1, 'second')
+        assert not outbox.process(), 'Digest must wait for window'
+        clock.now = 5
+        assert outbox.process()
+        assert len(bot.sent) == 1
+        chat_id, text = bot.sent[0]
+        assert text.split(DIGEST_SEPARATOR)[1:] == ['first', 'second']
+        assert len(outbox) == 0
+
+    def test_full_digest_sent_before_window(self):
+        from outbox import Outbox
+
+        clock = FakeClock()
+        bot = FlakyBot()
+        outbox = Outbox(bot, clock=clock, window=60, digest_size=3)
+        for number in range(4):
+            outbox.enqueue(1, f'message {number}')
+        assert outbox.process()
+        assert bot.sent[0][1].count('message') == 3
+        assert len(outbox) == 1
+
+    def test_digest_within_telegram_limit(self):
+        from outbox import MESSAGE_LIMIT, Outbox
+
+        clock = FakeClock()
+        bot = FlakyBot()
+        outbox = Outbox(bot, chat_rate=100, clock=clock, digest_size=100)
+        for number in range(10):
+            outbox.enqueue(1, str(number) * 1000)
+        while outbox.process():
+            clock.now += 1
+        assert len(bot.sent) == 3
+        assert all(len(text) <= MESSAGE_LIMIT for _, text in bot.sent)
+        assert ''.join(text[-1] for _, text in bot.sent) == '379'
+
+    def test_drain_sends_held_digest(self):
+        from outbox import Outbox
+
+        bot = FlakyBot()
+        outbox = Outbox(bot, window=600, digest_size=10, workers=1)
+        outbox.start()
+        outbox.enqueue(1, 'first')
+        outbox.enqueue(1, 'second')
+        assert outbox.drain(timeout=5)
+        outbox.stop()
+        assert len(bot.sent) == 1
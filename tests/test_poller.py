@@ -0,0 +1,188 @@
+import json
+import sqlite3
+from http import HTTPStatus
+
+import pytest
+import requests
+from utils import MockBot, MockResponse
+
+
+class TestRoster:
+
+    def test_load_json_roster(self, tmp_path):
+        from tenants import load_roster
+
+        path = tmp_path / 'roster.json'
+        path.write_text(json.dumps([
+            {'token': 'first', 'chat_id': 1},
+            {'token': 'second', 'chat_id': 2, 'id': 'student-2'},
+        ]))
+        tenants = load_roster(str(path))
+        assert [tenant.chat_id for tenant in tenants] == [1, 2]
+        assert tenants[0].headers == {'Authorization': 'OAuth first'}
+        assert tenants[1].id == 'student-2'
+        assert 'first' not in tenants[0].id
+
+    def test_load_sqlite_roster(self, tmp_path):
+        from tenants import load_roster
+
+        path = str(tmp_path / 'roster.sqlite3')
+        connection = sqlite3.connect(path)
+        connection.execute('CREATE TABLE tenants (token TEXT, chat_id INT)')
+        connection.execute("INSERT INTO tenants VALUES ('token', 42)")
+        connection.commit()
+        connection.close()
+        tenants = load_roster(path)
+        assert len(tenants) == 1
+        assert tenants[0].chat_id == 42
+
+    def test_subscribers_of_one_token_merged(self, tmp_path):
+        from tenants import load_roster
+
+        path = tmp_path / 'roster.json'
+        path.write_text(json.dumps([
+            {'token': 'student', 'chat_id': 1, 'id': 'student'},
+            {'token': 'other', 'chat_id': 2},
+            {'token': 'student', 'chat_id': [3, 1], 'id': 'mentors'},
+        ]))
+        tenants = load_roster(str(path))
+        assert [tenant.id for tenant in tenants][0] == 'student'
+        assert len(tenants) == 2
+        assert tenants[0].chat_ids == [1, 3]
+        assert tenants[0].chat_id == 1
+
+    def test_unknown_roster_format(self):
+        from tenants import load_roster
+
+        with pytest.raises(ValueError):
+            load_roster('roster.txt')
+
+
+class TestPoller:
+
+    def test_each_tenant_polled_with_own_token(self, monkeypatch):
+        from poller import Poller
+        from tenants import Tenant
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            token = headers['Authorization'].split()[1]
+            return MockResponse({
+                'homeworks': [
+                    {'homework_name': f'hw_{token}', 'status': 'approved'}
+                ],
+                'current_date': 100,
+            })
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        bot = MockBot()
+        tenants = [Tenant('a', 1), Tenant('b', 2)]
+        poller = Poller(bot, tenants)
+        poller.run_cycle()
+        assert [chat_id for chat_id, _ in bot.sent] == [1, 2]
+        assert 'hw_a' in bot.sent[0][1]
+        assert all(tenant.cursor == 100 for tenant in tenants)
+
+        poller.run_cycle()
+        assert len(bot.sent) == 2, (
+            'Unchanged statuses must not be sent again'
+        )
+
+    def test_status_fans_out_to_subscribers(self, monkeypatch):
+        from poller import Poller
+        from tenants import Tenant
+
+        requests_sent = []
+
+        def mock_get(*args, **kwargs):
+            requests_sent.append(kwargs['headers']['Authorization'])
+            return MockResponse({
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 100,
+            })
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        bot = MockBot()
+        poller = Poller(bot, [Tenant('t', 1), Tenant('t', 2), Tenant('u', 3)])
+        poller.run_cycle()
+        assert requests_sent == ['OAuth t', 'OAuth u'], (
+            'Every token must be polled once per cycle'
+        )
+        assert [chat_id for chat_id, _ in bot.sent] == [1, 2, 3]
+
+    def test_roster_update_keeps_unchanged_tenants(self):
+        from poller import Poller
+        from tenants import Tenant
+
+        kept, removed = Tenant('kept', 1, 'kept'), Tenant('gone', 2, 'gone')
+        poller = Poller(MockBot(), [kept, removed])
+        kept.snapshot['1'] = ('approved', 0)
+        cursor = kept.cursor
+        poller.submit(lambda: poller.update_tenants([
+            Tenant('kept', [1, 3], 'kept'), Tenant('new', 4, 'new'),
+        ]))
+        assert [tenant.id for tenant in poller.tenants] == ['kept', 'gone']
+        poller.run_calls()
+
+        assert [tenant.id for tenant in poller.tenants] == ['kept', 'new']
+        assert poller.tenants[0] is kept
+        assert kept.chat_ids == [1, 3]
+        assert kept.snapshot and kept.cursor == cursor
+        assert poller.tenants[1].cursor is not None
+        assert sorted(poller.scheduler.pop_due()) == ['kept', 'new'], (
+            'Removed tenant must not be polled'
+        )
+
+    def test_error_reported_once(self, monkeypatch):
+        from poller import Poller
+        from tenants import Tenant
+
+        def mock_get(*args, **kwargs):
+            return MockResponse({}, HTTPStatus.INTERNAL_SERVER_ERROR)
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        bot = MockBot()
+        tenant = Tenant('a', 1)
+        poller = Poller(bot, [tenant])
+        poller.run_cycle()
+        poller.run_cycle()
+        assert len(bot.sent) == 1
+        assert bot.sent[0][1].startswith('Program error')
+
+    def test_injected_scheduler_gets_tenants(self):
+        from poller import Poller
+        from scheduler import PollScheduler
+        from tenants import Tenant
+
+        scheduler = PollScheduler()
+        Poller(MockBot(), [Tenant('a', 1), Tenant('b', 2)],
+               scheduler=scheduler)
+        assert len(scheduler) == 2
+
+    def test_overdue_tenants_polled_first_after_restart(self):
+        import time
+
+        from poller import Poller
+        from state import MemoryStateStore
+        from tenants import Tenant
+
+        store = MemoryStateStore()
+        now = time.time()
+        store.due = {'late': now - 100, 'later': now - 500,
+                     'early': now + 1000}
+        tenants = [Tenant(token, 1, token)
+                   for token in ('early', 'late', 'new', 'later')]
+        poller = Poller(MockBot(), tenants, store=store)
+        assert poller.scheduler.pop_due() == ['later', 'late', 'new']
+
+    def test_stop_wakes_run_forever(self):
+        import threading
+
+        from poller import Poller
+        from scheduler import PollScheduler
+
+        poller = Poller(MockBot(), [], scheduler=PollScheduler())
+        thread = threading.Thread(target=poller.run_forever)
+        thread.start()
+        poller.stop()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
@@ -0,0 +1,76 @@
+import json
+import threading
+import time
+
+
+def get_api_answer(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def parse_status(stop):
+    while not stop.is_set():
+        time.sleep(0.001)
+
+
+class TestProfiler:
+
+    def test_collapse_and_phases(self):
+        import sys
+        from collections import Counter
+
+        from profiler import collapse, phase_samples
+
+        stack = collapse(sys._getframe(), 'main')
+        assert stack.startswith('main;')
+        assert stack.split(';')[-1].startswith('test_profiler.py:')
+        assert stack.endswith('test_collapse_and_phases')
+        phases = phase_samples(Counter({
+            'main;homework.py:get_api_answer;x.py:get': 3,
+            'outbox-0;outbox.py:Outbox._deliver': 2,
+            'main;poller.py:Poller.run_forever': 5,
+        }))
+        assert phases['get_api_answer'] == 3
+        assert phases['send_message'] == 2
+        assert phases['parse_status'] == 0
+
+    def test_profile_writes_stacks_and_phases(self, tmp_path):
+        from profiler import SamplingProfiler
+
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=target, args=(stop,), daemon=True)
+            for target in (get_api_answer, parse_status)
+        ]
+        for thread in threads:
+            thread.start()
+        profiler = SamplingProfiler(interval=0.001, output_dir=str(tmp_path))
+        try:
+            summary = profiler.profile(0.2)
+        finally:
+            stop.set()
+        assert summary['samples'] > 0
+        for phase in ('get_api_answer', 'parse_status'):
+            assert summary['phases'][phase]['samples'] == summary['samples']
+            assert summary['phases'][phase]['seconds'] > 0.1
+        assert summary['phases']['send_message']['samples'] == 0
+        with open(summary['folded']) as folded:
+            line = folded.readline()
+        assert line.rsplit(' ', 1)[1].strip().isdigit()
+        with open(summary['summary']) as file:
+            assert json.load(file)['phases'] == summary['phases']
+
+    def test_one_session_at_a_time(self, tmp_path):
+        from profiler import SamplingProfiler
+
+        profiler = SamplingProfiler(output_dir=str(tmp_path))
+        profiler.start(0.2)
+        time.sleep(0.05)
+        status, _, _ = profiler.profile_page({'seconds': ['0.1']})
+        assert status == 409
+        time.sleep(0.3)
+        status, content_type, body = profiler.profile_page(
+            {'seconds': ['0.05']}
+        )
+        assert status == 200
+        assert 'phases' in json.loads(body)
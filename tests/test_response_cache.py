@@ -0,0 +1,91 @@
+from http import HTTPStatus
+
+import requests
+from utils import MockBot, MockResponse
+
+
+class TestResponseCache:
+
+    def test_etag_sent_and_not_modified_is_hit(self, monkeypatch):
+        import homework
+        from metrics import PRACTICUM_CACHE
+        from response_cache import ResponseCache
+
+        sent_headers = []
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            sent_headers.append(headers)
+            if headers.get('If-None-Match') == '"v1"':
+                return MockResponse(status_code=HTTPStatus.NOT_MODIFIED)
+            return MockResponse(
+                {'homeworks': [], 'current_date': 1}, headers={'ETag': '"v1"'}
+            )
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        cache = ResponseCache()
+        hits = PRACTICUM_CACHE.value(result='hit')
+        headers = {'Authorization': 'OAuth token'}
+        assert homework.fetch_homework_statuses(headers, 5, cache) == {
+            'homeworks': [], 'current_date': 1
+        }
+        assert homework.fetch_homework_statuses(headers, 5, cache) is None
+        assert 'If-None-Match' not in sent_headers[0]
+        assert sent_headers[1]['If-None-Match'] == '"v1"'
+        assert PRACTICUM_CACHE.value(result='hit') == hits + 1
+
+    def test_body_hash_ignores_current_date(self, monkeypatch):
+        import homework
+        from response_cache import ResponseCache
+
+        dates = iter(range(100, 200))
+        monkeypatch.setattr(requests, 'get', lambda *a, **k: MockResponse(
+            {'homeworks': [{'id': 1}], 'current_date': next(dates)}
+        ))
+        cache = ResponseCache()
+        headers = {'Authorization': 'OAuth token'}
+        assert homework.fetch_homework_statuses(headers, 5, cache)
+        assert homework.fetch_homework_statuses(headers, 5, cache) is None
+        assert homework.fetch_homework_statuses(headers, 6, cache)
+
+    def test_least_recently_used_evicted(self):
+        from response_cache import ResponseCache
+
+        cache = ResponseCache(max_entries=2)
+        response = MockResponse({'homeworks': []}, headers={'ETag': '"a"'})
+        for key in ('first', 'second', 'first', 'third'):
+            cache.unchanged(key, response)
+        assert len(cache) == 2
+        assert cache.conditional_headers('first')
+        assert cache.conditional_headers('second') == {}
+
+
+class TestCachedPoller:
+
+    def test_cursor_kept_while_nothing_changes(self, monkeypatch):
+        from poller import Poller
+        from response_cache import ResponseCache
+        from tenants import Tenant
+
+        requested = []
+        bodies = iter([
+            {'homeworks': [], 'current_date': 200},
+            {'homeworks': [], 'current_date': 300},
+            {'homeworks': [{'id': 1, 'homework_name': 'hw',
+                            'status': 'approved'}], 'current_date': 400},
+        ])
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            requested.append(params['from_date'])
+            return MockResponse(next(bodies))
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        tenant = Tenant('token', 1)
+        tenant.cursor = 100
+        bot = MockBot()
+        poller = Poller(bot, [tenant], cache=ResponseCache())
+        assert poller.poll_tenant(tenant) == []
+        assert poller.poll_tenant(tenant) == []
+        assert len(poller.poll_tenant(tenant)) == 1
+        assert requested == [100, 100, 100]
+        assert tenant.cursor == 400
+        assert len(bot.sent) == 1
@@ -0,0 +1,84 @@
+from utils import FakeClock
+
+
+class TestTokenBucket:
+
+    def test_rate_limited(self):
+        from ratelimit import TokenBucket
+
+        clock = FakeClock()
+        bucket = TokenBucket(2, capacity=2, clock=clock)
+        assert bucket.consume()
+        assert bucket.consume()
+        assert not bucket.consume()
+        assert bucket.delay() == 0.5
+        clock.now = 0.5
+        assert bucket.consume()
+
+
+class TestPollScheduler:
+
+    def make_scheduler(self, clock, **kwargs):
+        from scheduler import PollScheduler
+
+        kwargs.setdefault('review_hours', range(0))
+        return PollScheduler(
+            min_interval=10, reviewing_interval=20, base_interval=100,
+            max_interval=400, clock=clock, **kwargs
+        )
+
+    def test_deadlines_in_order(self):
+        clock = FakeClock()
+        scheduler = self.make_scheduler(clock)
+        scheduler.add('late', 5)
+        scheduler.add('early', 1)
+        assert scheduler.pop_due() == []
+        assert scheduler.sleep_time() == 1
+        clock.now = 5
+        assert scheduler.pop_due() == ['early', 'late']
+        assert len(scheduler) == 0
+
+    def test_interval_adapts_to_activity(self):
+        from models import Homework
+
+        clock = FakeClock()
+        scheduler = self.make_scheduler(clock)
+        scheduler.add('tenant')
+        reviewing = [Homework(1, 'hw', 'reviewing')]
+        approved = [Homework(1, 'hw', 'approved')]
+        assert scheduler.record('tenant', reviewing) == 10
+        assert scheduler.record('tenant', []) == 20
+        assert scheduler.record('tenant', approved) == 10
+        assert scheduler.record('tenant', []) == 20
+        assert scheduler.record('tenant', []) == 40
+        for _ in range(5):
+            interval = scheduler.record('tenant', [])
+        assert interval == 400
+
+    def test_review_hours_use_base_interval(self):
+        clock = FakeClock()
+        scheduler = self.make_scheduler(clock, review_hours=range(24))
+        scheduler.add('tenant')
+        assert scheduler.record('tenant', []) == 100
+        assert scheduler.record('tenant', []) == 100
+
+    def test_budget_limits_due_polls(self):
+        clock = FakeClock()
+        scheduler = self.make_scheduler(clock, budget=2)
+        for number in range(5):
+            scheduler.add(str(number))
+        assert len(scheduler.pop_due()) == 2
+        assert scheduler.sleep_time() == 0.5
+        clock.now = 1
+        assert len(scheduler.pop_due()) == 2
+        assert scheduler.lag() == 1, (
+            'Polls held back by budget must show up as lag'
+        )
+
+    def test_rescheduled_tenant_polled_once(self):
+        clock = FakeClock()
+        scheduler = self.make_scheduler(clock)
+        scheduler.add('tenant', 5)
+        scheduler.add('tenant', 1)
+        clock.now = 10
+        assert scheduler.pop_due() == ['tenant']
@@ -0,0 +1,49 @@
+class TestSharding:
+
+    def make_tenants(self, count):
+        from tenants import Tenant
+
+        return [Tenant(f'token-{number}', number) for number in range(count)]
+
+    def test_ring_is_deterministic(self):
+        from sharding import HashRing
+
+        first = HashRing(['a', 'b', 'c'])
+        second = HashRing(['c', 'b', 'a'])
+        keys = [f'token-{number}' for number in range(200)]
+        assert [first.node_for(k) for k in keys] == [
+            second.node_for(k) for k in keys
+        ]
+
+    def test_shards_partition_tenants(self):
+        from sharding import HashRing, split_tenants
+
+        tenants = self.make_tenants(1000)
+        shards = split_tenants(tenants, HashRing(['a', 'b', 'c', 'd']))
+        assert sorted(shards) == ['a', 'b', 'c', 'd']
+        assert sum(len(shard) for shard in shards.values()) == 1000
+        assert all(150 < len(shard) < 350 for shard in shards.values())
+
+    def test_added_node_moves_few_tenants(self):
+        from sharding import HashRing
+
+        ring = HashRing(['a', 'b', 'c', 'd'])
+        keys = [f'token-{number}' for number in range(1000)]
+        before = {key: ring.node_for(key) for key in keys}
+        ring.add_node('e')
+        moved = [key for key in keys if ring.node_for(key) != before[key]]
+        assert all(ring.node_for(key) == 'e' for key in moved)
+        assert 100 < len(moved) < 300
+
+        ring.remove_node('e')
+        assert {key: ring.node_for(key) for key in keys} == before
+
+    def test_node_tenants(self):
+        from sharding import node_tenants
+
+        tenants = self.make_tenants(100)
+        nodes = ['a', 'b']
+        mine = node_tenants(tenants, nodes, 'a')
+        theirs = node_tenants(tenants, nodes, 'b')
+        assert len(mine) + len(theirs) == 100
+        assert not set(t.id for t in mine) & set(t.id for t in theirs)
@@ -0,0 +1,137 @@
+import sqlite3
+
+import pytest
+import requests
+from utils import MockBot, MockResponse
+
+
+class TestSQLiteStateStore:
+
+    def test_state_survives_restart(self, tmp_path):
+        from state import SQLiteStateStore
+        from tenants import Tenant
+
+        path = str(tmp_path / 'state.sqlite3')
+        store = SQLiteStateStore(path)
+        tenant = Tenant('token', 1)
+        tenant.cursor = 123
+        tenant.due = 456.5
+        store.save(tenant, {'7': ('approved', 0)})
+        store.save_due(tenant)
+        store.close()
+
+        store = SQLiteStateStore(path)
+        restored = Tenant('token', 1)
+        store.load(restored)
+        store.close()
+        assert restored.cursor == 123
+        assert restored.due == 456.5
+        assert restored.snapshot == {'7': ('approved', 0)}
+
+    def test_shards_share_state_not_outbox(self, tmp_path):
+        from state import SQLiteStateStore
+        from tenants import Tenant
+
+        path = str(tmp_path / 'state.sqlite3')
+        stores = [
+            SQLiteStateStore(path, shard=shard, shards=3)
+            for shard in range(3)
+        ]
+        tenant = Tenant('token', 1)
+        tenant.cursor = 123
+        stores[0].save(tenant, {})
+        for shard, store in enumerate(stores):
+            store.add_pending(f'm{shard}', shard, 'text')
+            store.close()
+
+        moved = Tenant('token', 1)
+        first = SQLiteStateStore(path, shard=1, shards=2)
+        first.load(moved)
+        assert moved.cursor == 123, 'Tenant keeps state on another shard'
+        assert [row[0] for row in first.load_pending()] == ['m1']
+        second = SQLiteStateStore(path, shard=0, shards=2)
+        assert sorted(row[0] for row in second.load_pending()) == [
+            'm0', 'm2'
+        ], 'Messages of removed shard must not be lost'
+        first.close()
+        second.close()
+
+    def test_outbox_of_old_database_migrated(self, tmp_path):
+        from state import SQLiteStateStore
+
+        path = str(tmp_path / 'state.sqlite3')
+        connection = sqlite3.connect(path)
+        connection.execute(
+            'CREATE TABLE outbox (id TEXT PRIMARY KEY, chat_id NOT NULL, '
+            'text TEXT NOT NULL, created REAL NOT NULL)'
+        )
+        connection.execute("INSERT INTO outbox VALUES ('old', 1, 'text', 1)")
+        connection.commit()
+        connection.close()
+        store = SQLiteStateStore(path)
+        assert store.load_pending() == [('old', 1, 'text')]
+        store.close()
+
+    def test_writes_are_batched(self, tmp_path):
+        from state import SQLiteStateStore
+        from tenants import Tenant
+
+        path = str(tmp_path / 'state.sqlite3')
+        store = SQLiteStateStore(path, batch_size=3)
+        tenant = Tenant('token', 1)
+        tenant.cursor = 1
+        store.save(tenant, {})
+
+        def saved_cursors():
+            connection = sqlite3.connect(path)
+            try:
+                return connection.execute(
+                    'SELECT COUNT(*) FROM cursors'
+                ).fetchone()[0]
+            finally:
+                connection.close()
+
+        assert saved_cursors() == 0
+        store.save(tenant, {'1': ('approved', 0), '2': ('reviewing', 0)})
+        assert saved_cursors() == 1
+        journal_mode = store.connection.execute(
+            'PRAGMA journal_mode'
+        ).fetchone()[0]
+        assert journal_mode == 'wal'
+        store.close()
+
+    def test_store_must_implement_interface(self):
+        from state import StateStore
+
+        class PartialStore(StateStore):
+
+            def load(self, tenant):
+                pass
+
+        with pytest.raises(TypeError):
+            PartialStore()
+
+
+class TestPollerState:
+
+    def test_restart_does_not_resend(self, monkeypatch):
+        from poller import Poller
+        from state import MemoryStateStore
+        from tenants import Tenant
+
+        requested = []
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            requested.append(params['from_date'])
+            return MockResponse({
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 500,
+            })
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        store = MemoryStateStore()
+        bot = MockBot()
+        Poller(bot, [Tenant('token', 1)], store=store).run_cycle()
+        Poller(bot, [Tenant('token', 1)], store=store).run_cycle()
+        assert len(bot.sent) == 1
+        assert requested[1] == 500
@@ -0,0 +1,85 @@
+import json
+import logging
+from http import HTTPStatus
+
+import pytest
+from utils import MockBot, MockResponse
+
+
+class MockClient:
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        return MockResponse(
+            self.responses.pop(0), headers={'ETag': '"v1"'}
+        )
+
+
+class TestTraffic:
+
+    @pytest.mark.parametrize('name', ['capture.jsonl', 'capture.jsonl.gz'])
+    def test_record_and_replay(self, tmp_path, name):
+        from benchmarks.replay import replay
+        from tenants import token_fingerprint
+        from traffic import (
+            RecordingBot,
+            RecordingClient,
+            TrafficRecorder,
+            read_capture,
+        )
+
+        path = str(tmp_path / name)
+        homeworks = [{'id': 1, 'homework_name': 'hw', 'status': 'reviewing'}]
+        recorder = TrafficRecorder(path)
+        client = RecordingClient(MockClient([
+            {'homeworks': homeworks, 'current_date': 1},
+            {'homeworks': [], 'current_date': 2},
+            {'homeworks': [dict(homeworks[0], status='approved')],
+             'current_date': 3},
+        ]), recorder)
+        bot = RecordingBot(MockBot(), recorder)
+        for from_date in (0, 1, 1):
+            client.get('url', headers={'Authorization': 'OAuth secret'},
+                       params={'from_date': from_date})
+        bot.send_message(1, 'first')
+        recorder.close()
+
+        records = list(read_capture(path))
+        assert [record['kind'] for record in records] == [
+            'practicum', 'practicum', 'practicum', 'telegram'
+        ]
+        assert records[0]['tenant'] == token_fingerprint('secret')
+        assert records[0]['headers'] == {'ETag': '"v1"'}
+        assert 'secret' not in json.dumps(records)
+
+        results = replay(records)
+        assert results['polls'] == 3
+        assert results['tenants'] == 1
+        assert results['sends'] == 2
+        assert results['recorded_sends'] == 1
+
+    def test_replay_outage(self, caplog):
+        from benchmarks.replay import replay
+
+        records = [
+            {'kind': 'practicum', 'tenant': 'tenant', 't': 0, 'elapsed': 0,
+             'status': HTTPStatus.INTERNAL_SERVER_ERROR, 'body': ''}
+            for _ in range(10)
+        ]
+        records.append({
+            'kind': 'practicum', 'tenant': 'tenant', 't': 0, 'elapsed': 0,
+            'status': HTTPStatus.OK, 'body': json.dumps({
+                'homeworks': [
+                    {'id': 1, 'homework_name': 'hw', 'status': 'approved'}
+                ],
+                'current_date': 1,
+            }),
+        })
+        with caplog.at_level(logging.INFO):
+            results = replay(records)
+        assert results['polls'] == 11
+        assert 'resolved after 10 failures: Not available' in caplog.text, (
+            'Every recorded response must be replayed as HTTP error'
+        )
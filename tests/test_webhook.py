@@ -0,0 +1,103 @@
+from http import HTTPStatus
+
+import pytest
+import requests
+from utils import MockBot
+
+
+@pytest.fixture
+def receiver():
+    from poller import Poller
+    from tenants import Tenant
+    from webhook import start_webhook_server
+
+    bot = MockBot()
+    tenant = Tenant('token', 1, 'student')
+    poller = Poller(bot, [tenant])
+    server = start_webhook_server(poller, 0, secret='secret')
+    url = f'http://127.0.0.1:{server.server_address[1]}/homeworks/'
+    yield poller, bot, tenant, url
+    server.shutdown()
+    server.server_close()
+
+
+class TestWebhook:
+
+    def test_pushed_status_sent(self, receiver):
+        poller, bot, tenant, url = receiver
+        cursor = tenant.cursor
+        response = requests.post(
+            url + 'student', headers={'X-Webhook-Secret': 'secret'},
+            json={'homeworks': [
+                {'id': 1, 'homework_name': 'hw', 'status': 'approved'}
+            ], 'current_date': cursor + 100},
+        )
+        assert response.status_code == HTTPStatus.ACCEPTED
+        poller.run_pushed(timeout=1)
+        assert len(bot.sent) == 1
+        assert tenant.cursor == cursor, 'Pushes must not move cursor'
+
+    @pytest.mark.parametrize('path, secret, payload, status', [
+        ('student', 'wrong', {'homeworks': []}, HTTPStatus.FORBIDDEN),
+        ('student', 'secret', {'homeworks': {}}, HTTPStatus.BAD_REQUEST),
+        ('student', 'secret', {}, HTTPStatus.BAD_REQUEST),
+        ('stranger', 'secret', {'homeworks': []}, HTTPStatus.NOT_FOUND),
+    ])
+    def test_rejected_payloads(self, receiver, path, secret, payload,
+                               status):
+        poller, bot, tenant, url = receiver
+        response = requests.post(
+            url + path, headers={'X-Webhook-Secret': secret}, json=payload
+        )
+        assert response.status_code == status
+        poller.run_pushed()
+        assert bot.sent == []
+
+    def test_query_string_ignored(self, receiver):
+        poller, bot, tenant, url = receiver
+        response = requests.post(
+            url + 'student?source=practicum',
+            headers={'X-Webhook-Secret': 'secret'},
+            json={'homeworks': [
+                {'id': 1, 'homework_name': 'hw', 'status': 'approved'}
+            ]},
+        )
+        assert response.status_code == HTTPStatus.ACCEPTED
+        poller.run_pushed(timeout=1)
+        assert len(bot.sent) == 1
+
+    @pytest.mark.parametrize('length', ['abc', '-1'])
+    def test_invalid_content_length(self, receiver, length):
+        from http.client import HTTPConnection
+        from urllib.parse import urlsplit
+
+        poller, bot, tenant, url = receiver
+        address = urlsplit(url)
+        connection = HTTPConnection(address.hostname, address.port, timeout=5)
+        connection.putrequest('POST', address.path + 'student')
+        connection.putheader('X-Webhook-Secret', 'secret')
+        connection.putheader('Content-Length', length)
+        connection.endheaders()
+        response = connection.getresponse()
+        connection.close()
+        assert response.status == HTTPStatus.BAD_REQUEST
+
+    @pytest.mark.parametrize('host, secret, refused', [
+        ('127.0.0.1', None, False),
+        ('localhost', None, False),
+        ('::1', None, False),
+        ('0.0.0.0', None, True),
+        ('0.0.0.0', 'secret', False),
+    ])
+    def test_public_receiver_needs_secret(self, monkeypatch, host, secret,
+                                          refused):
+        import homework
+
+        monkeypatch.setattr(homework, 'WEBHOOK_PORT', '8080')
+        monkeypatch.setattr(homework, 'WEBHOOK_HOST', host)
+        monkeypatch.setattr(homework, 'WEBHOOK_SECRET', secret)
+        if refused:
+            with pytest.raises(SystemExit):
+                homework.check_webhook()
+        else:
+            homework.check_webhook()
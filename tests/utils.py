@@ -1,6 +1,10 @@
+import json
+from http import HTTPStatus
 from inspect import signature
 from types import ModuleType
 
+API_URL = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+
 
 def check_function(scope: ModuleType, func_name: str, params_qty: int = 0):
     """Checks if scope has a function with specific name and params with qty"""
@@ -37,3 +41,39 @@ def check_default_var_exists(scope: ModuleType, var_name: str) -> None:
         f'{var_name} должна быть переменной, а не функцией.'
     )
 
+
+class FakeClock:
+    """Monotonic clock the test moves by hand through `now`"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class MockResponse:
+    """Practicum API response with a JSON body"""
+
+    def __init__(self, data=None, status_code=HTTPStatus.OK, headers=None):
+        self.data = data
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(data).encode()
+        self.url = API_URL
+
+    def json(self):
+        return self.data
+
+    def close(self):
+        pass
+
+
+class MockBot:
+    """Telegram bot that keeps sent messages as (chat_id, text)"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
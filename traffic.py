@@ -0,0 +1,121 @@
+import gzip
+import json
+import threading
+import time
+
+from tenants import token_fingerprint
+
+
+def open_capture(path: str, mode: str):
+    """Open capture file, compressed with gzip when path ends with .gz."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def read_capture(path: str):
+    """Yield records of capture file in order."""
+    with open_capture(path, 'r') as capture:
+        for line in capture:
+            if line.strip():
+                yield json.loads(line)
+
+
+class TrafficRecorder:
+    """Append-only JSON lines log of Practicum and Telegram traffic.
+
+    Every record has `t` - seconds since recorder was created, `kind` and
+    `elapsed` - duration of the call. Tokens are never written, tenants
+    are identified by token fingerprint.
+    """
+
+    def __init__(self, path: str, clock=time.monotonic) -> None:
+        """Open capture file for appending."""
+        self.clock = clock
+        self.started = clock()
+        self._file = open_capture(path, 'a')
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, started: float, **fields) -> None:
+        """Append record about call which began at `started`."""
+        now = self.clock()
+        line = json.dumps(
+            {'t': round(started - self.started, 6), 'kind': kind,
+             'elapsed': round(now - started, 6), **fields},
+            ensure_ascii=False, separators=(',', ':'),
+        )
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self) -> None:
+        """Close capture file."""
+        with self._lock:
+            self._file.close()
+
+
+class RecordingClient:
+    """Client of Practicum API which records requests and responses.
+
+    Body is read as a whole to record it, so streaming gives no benefit
+    while traffic is captured.
+    """
+
+    def __init__(self, client, recorder: TrafficRecorder) -> None:
+        """Wrap client with recorder."""
+        self.client = client
+        self.recorder = recorder
+
+    def get(self, url: str, headers: dict = None, params: dict = None,
+            **kwargs):
+        """Send GET request with inner client and record it."""
+        token = (headers or {}).get('Authorization', '').split()[-1:]
+        started = self.recorder.clock()
+        response = self.client.get(
+            url, headers=headers, params=params, **kwargs
+        )
+        self.recorder.record(
+            'practicum', started,
+            tenant=token_fingerprint(token[0]) if token else None,
+            from_date=(params or {}).get('from_date'),
+            status=int(response.status_code),
+            headers={
+                name: response.headers[name]
+                for name in ('ETag', 'Last-Modified')
+                if name in response.headers
+            },
+            body=response.content.decode('utf-8', 'replace'),
+        )
+        return response
+
+    def close(self) -> None:
+        """Close inner client."""
+        self.client.close()
+
+
+class RecordingBot:
+    """Telegram bot which records sent messages."""
+
+    def __init__(self, bot, recorder: TrafficRecorder) -> None:
+        """Wrap bot with recorder."""
+        self.bot = bot
+        self.recorder = recorder
+
+    def send_message(self, chat_id, text: str, **kwargs):
+        """Send message with inner bot and record it."""
+        started = self.recorder.clock()
+        error = None
+        try:
+            return self.bot.send_message(chat_id, text, **kwargs)
+        except Exception as exception:
+            error = type(exception).__name__
+            raise
+        finally:
+            self.recorder.record(
+                'telegram', started, chat_id=str(chat_id), text=text,
+                error=error,
+            )
+
+    def __getattr__(self, name: str):
+        """Pass other attributes to inner bot."""
+        return getattr(self.bot, name)
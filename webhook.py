@@ -0,0 +1,97 @@
+import hmac
+import ipaddress
+import json
+import logging
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from homework import check_response
+from metrics import WEBHOOK_REQUESTS
+
+WEBHOOK_HOST = '127.0.0.1'
+WEBHOOK_PATH = '/homeworks/'
+SECRET_HEADER = 'X-Webhook-Secret'
+MAX_BODY = 1024 * 1024
+
+
+def is_loopback(host: str) -> bool:
+    """Tell whether receiver on host is reachable only from this machine."""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Accept homework statuses pushed to /homeworks/<tenant id>.
+
+    Payload has the same shape as Practicum API response and is checked
+    by `check_response` before it is queued in poller.
+    """
+
+    def do_POST(self) -> None:
+        """Validate pushed payload and queue it for tenant."""
+        status, text = self.accept()
+        WEBHOOK_REQUESTS.inc(status=int(status))
+        data = (text + '\n').encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def accept(self) -> tuple:
+        """Return status and text of answer to pushed payload."""
+        secret = self.server.secret
+        if secret and not hmac.compare_digest(
+            self.headers.get(SECRET_HEADER, ''), secret
+        ):
+            return HTTPStatus.FORBIDDEN, 'Wrong secret'
+        path = urlsplit(self.path).path
+        if not path.startswith(WEBHOOK_PATH):
+            return HTTPStatus.NOT_FOUND, 'Not found'
+        length = self.content_length()
+        if length is None:
+            return HTTPStatus.BAD_REQUEST, 'Invalid Content-Length'
+        if length > MAX_BODY:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'Payload too large'
+        try:
+            homeworks = check_response(json.loads(self.rfile.read(length)))
+        except (ValueError, TypeError, KeyError) as error:
+            return HTTPStatus.BAD_REQUEST, f'Invalid payload: {error}'
+        try:
+            self.server.poller.push(path[len(WEBHOOK_PATH):], homeworks)
+        except KeyError:
+            return HTTPStatus.NOT_FOUND, 'Unknown tenant'
+        return HTTPStatus.ACCEPTED, 'Accepted'
+
+    def content_length(self):
+        """Return length of body or None if header is not valid."""
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            return None
+        return length if length >= 0 else None
+
+    def log_message(self, *args) -> None:
+        """Keep access log out of bot log."""
+
+
+def start_webhook_server(poller, port: int, host: str = WEBHOOK_HOST,
+                         secret: str = None):
+    """Receive pushed homeworks for poller in background thread."""
+    server = ThreadingHTTPServer((host, port), WebhookHandler)
+    server.daemon_threads = True
+    server.poller = poller
+    server.secret = secret
+    threading.Thread(
+        target=server.serve_forever, name='webhook-server', daemon=True
+    ).start()
+    logging.info(
+        'Webhook receiver listens on %s:%s', host, server.server_address[1]
+    )
+    return server